@@ -0,0 +1,108 @@
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://mongo:27017")
+
+client = AsyncIOMotorClient(MONGO_URL)
+db = client.comments_db
+
+
+async def init_db():
+    # Üst seviye yorum listesi ("new" ve "top"): filtre + sıralama + cursor aynı indeksten.
+    # Eski yorumlarda parent_id yok; Mongo eksik alanı null gibi indeksler.
+    await db.comments.create_index(
+        [("manga_id", ASCENDING), ("parent_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="manga_thread_created",
+    )
+    await db.comments.create_index(
+        [("manga_id", ASCENDING), ("parent_id", ASCENDING), ("like_count", DESCENDING), ("_id", DESCENDING)],
+        name="manga_thread_top",
+    )
+    # Bölüm sayfası: aynı listeler bir bölüme daraltılmış halde
+    await db.comments.create_index(
+        [("manga_id", ASCENDING), ("chapter_number", ASCENDING), ("parent_id", ASCENDING),
+         ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="manga_chapter_thread_created",
+    )
+    await db.comments.create_index(
+        [("manga_id", ASCENDING), ("chapter_number", ASCENDING), ("parent_id", ASCENDING),
+         ("like_count", DESCENDING), ("_id", DESCENDING)],
+        name="manga_chapter_thread_top",
+    )
+    await db.comments.create_index(
+        [("parent_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+        name="replies",
+    )
+    if "manga_created" in await db.comments.index_information():
+        await db.comments.drop_index("manga_created")  # manga_thread_created kapsıyor
+    await db.comment_reactions.create_index(
+        [("comment_id", ASCENDING), ("user_id", ASCENDING), ("reaction", ASCENDING)],
+        name="one_reaction_per_user",
+        unique=True,
+    )
+
+    # Sayaç alanları olmayan eski yorumlar bir kez güncellenir ("top" cursor'ı null ile çalışmaz)
+    if not await db.meta.find_one({"_id": "comment_counters"}):
+        await db.comments.update_many(
+            {"like_count": {"$exists": False}},
+            {"$set": {"like_count": 0, "reply_count": 0, "reactions": {}}},
+        )
+        await db.meta.insert_one({"_id": "comment_counters"})
+    # Sayaçlar ilk kez açılıyorsa (veya işlem öncesi yazılmışsa) yorumlardan yeniden hesapla
+    if not await db.meta.find_one({"_id": "comment_counts_v4"}):
+        await reconcile_counts()
+        await db.meta.insert_one({"_id": "comment_counts_v4"})
+
+
+async def reconcile_counts():
+    """Rebuild every comment counter from the stored documents.
+
+    ``comment_counts`` and ``reply_count`` are counted from the comments,
+    ``reactions`` and ``like_count`` from ``comment_reactions``.
+    ``count``/``chapters`` count all comments, ``top_level``/``chapters_top``
+    only those without a parent (the threads ``GET /comments`` lists).
+
+    Comments and reactions are written in one transaction with their
+    counters; this is the repair path for counters written before that
+    (or edited by hand). Run it while no comments or reactions are written.
+    """
+    await db.comments.aggregate([
+        {"$group": {
+            "_id": {"manga_id": "$manga_id", "chapter": "$chapter_number"},
+            "count": {"$sum": 1},
+            # Eski yorumlarda parent_id alanı hiç yok
+            "top_level": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$parent_id", None]}, None]}, 1, 0]}},
+        }},
+        {"$group": {
+            "_id": "$_id.manga_id",
+            "count": {"$sum": "$count"},
+            "top_level": {"$sum": "$top_level"},
+            "chapters": {"$push": {"k": {"$toString": "$_id.chapter"}, "v": "$count"}},
+            "chapters_top": {"$push": {"k": {"$toString": "$_id.chapter"}, "v": "$top_level"}},
+        }},
+        # Bölümsüz yorumlar yalnızca toplamda sayılır
+        {"$set": {
+            field: {"$arrayToObject": {"$filter": {"input": f"${field}", "cond": {"$ne": ["$$this.k", None]}}}}
+            for field in ("chapters", "chapters_top")
+        }},
+        {"$merge": {"into": "comment_counts", "whenMatched": "replace"}},
+    ]).to_list(None)
+    await db.comments.update_many({"reply_count": {"$ne": 0}}, {"$set": {"reply_count": 0}})
+    await db.comments.aggregate([
+        {"$match": {"parent_id": {"$ne": None}}},
+        {"$group": {"_id": "$parent_id", "reply_count": {"$sum": 1}}},
+        {"$merge": {"into": "comments", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]).to_list(None)
+    await db.comments.update_many(
+        {"$or": [{"like_count": {"$ne": 0}}, {"reactions": {"$ne": {}}}]},
+        {"$set": {"like_count": 0, "reactions": {}}},
+    )
+    await db.comment_reactions.aggregate([
+        {"$group": {"_id": {"comment_id": "$comment_id", "reaction": "$reaction"}, "count": {"$sum": 1}}},
+        {"$group": {"_id": "$_id.comment_id", "reactions": {"$push": {"k": "$_id.reaction", "v": "$count"}}}},
+        {"$set": {"reactions": {"$arrayToObject": "$reactions"}}},
+        {"$set": {"like_count": {"$ifNull": ["$reactions.like", 0]}}},
+        {"$merge": {"into": "comments", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]).to_list(None)
@@ -0,0 +1,98 @@
+"""In-process pub/sub for the live comment stream (``GET /comments/stream``).
+
+``create_comment`` publishes every new comment to the subscribers of its
+manga. Each connection owns a small bounded queue: a client that cannot
+keep up is not allowed to grow memory, its queue is cleared and it gets a
+``resync`` event telling it to reload the list with ``GET /comments/``.
+The bus keeps no history, so a client that reconnects with
+``Last-Event-ID`` starts with a ``resync`` as well: whatever was published
+while it was away is gone.
+
+Heartbeats come from a single task for the whole worker. It only wakes
+connections that had nothing to send since the last tick, so thousands of
+idle subscribers cost one timer, not one each.
+
+The bus only sees comments created by this worker; with several workers
+behind a load balancer the publish side needs a shared broker (e.g. a
+MongoDB change stream) feeding ``bus.publish``.
+"""
+import asyncio
+import os
+from typing import Dict, Optional, Set
+
+STREAM_QUEUE_SIZE = int(os.getenv("COMMENT_STREAM_QUEUE_SIZE", "32"))
+STREAM_HEARTBEAT = float(os.getenv("COMMENT_STREAM_HEARTBEAT", "15"))
+STREAM_RETRY_MS = int(os.getenv("COMMENT_STREAM_RETRY_MS", "3000"))
+
+HEARTBEAT = b": ping\n\n"
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+def sse_event(event: str, data: str, event_id: Optional[str] = None) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscriber:
+    def __init__(self, manga_id: int):
+        self.manga_id = manga_id
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.active = False  # son heartbeat'ten beri bir şey gönderildi mi
+
+    def offer(self, frame: bytes):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Yavaş istemci: birikeni at, listeyi yeniden çeksin
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+        self.active = True
+
+
+class CommentBus:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, manga_id: int, resync: bool = False) -> Subscriber:
+        subscriber = Subscriber(manga_id)
+        if resync:
+            subscriber.offer(RESYNC)
+        self._subscribers.setdefault(manga_id, set()).add(subscriber)
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.ensure_future(self._beat())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subs = self._subscribers.get(subscriber.manga_id)
+        if subs is not None:
+            subs.discard(subscriber)
+            if not subs:
+                del self._subscribers[subscriber.manga_id]
+
+    def publish(self, manga_id: int, frame: bytes):
+        # Olay bir kez kodlanır, tüm aboneler aynı bytes nesnesini alır
+        for subscriber in tuple(self._subscribers.get(manga_id, ())):
+            subscriber.offer(frame)
+
+    async def _beat(self):
+        while self._subscribers:
+            await asyncio.sleep(STREAM_HEARTBEAT)
+            for subs in tuple(self._subscribers.values()):
+                for subscriber in tuple(subs):
+                    if subscriber.active:
+                        subscriber.active = False
+                    elif subscriber.queue.empty():
+                        subscriber.queue.put_nowait(HEARTBEAT)
+
+
+bus = CommentBus()
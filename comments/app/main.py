@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from .db import init_db
 from .routers import comment_router
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -12,6 +13,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Total-Count"], 
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
+
+@app.on_event("startup")
+async def startup():
+    await init_db()
+
 app.include_router(comment_router, prefix="/comments")
\ No newline at end of file
@@ -1,10 +1,30 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
+class CommentCreate(BaseModel):
+    user_id: int
+    username: str
+    manga_id: int
+    text: str
+    chapter_number: Optional[int] = None  # Boşsa yorum mangaya ait
+    parent_id: Optional[str] = None  # Yanıtlanan yorum
+
 class Comment(BaseModel):
+    id: Optional[str] = None
     user_id: int
     username: str
     manga_id: int
     text: str
-    created_at: datetime = datetime.utcnow()
\ No newline at end of file
+    chapter_number: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)  # her yorum için ayrı zaman
+    parent_id: Optional[str] = None
+    root_id: Optional[str] = None  # Konunun en üstteki yorumu
+    # Sayaçlar belgede tutulur, listeleme sırasında hesaplanmaz
+    reply_count: int = 0
+    like_count: int = 0
+    reactions: Dict[str, int] = {}
+
+class ReactionCreate(BaseModel):
+    user_id: int
+    reaction: str = "like"
@@ -0,0 +1,51 @@
+"""Opaque cursors for comment listing.
+
+A cursor holds the sort key values of the last comment of a page (for
+example ``created_at`` and ``_id``); the next page continues strictly
+after it in that order.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Sequence
+
+from fastapi import HTTPException
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _json_object(value: dict):
+    if set(value) == {"$date"}:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw, object_hook=_json_object)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after(keys: Sequence[str], values: Sequence[Any], descending: bool = True) -> dict:
+    """Mongo filter for documents after ``values`` in ``keys`` order (all one direction)."""
+    op = "$lt" if descending else "$gt"
+    clauses = []
+    for i, key in enumerate(keys):
+        clause = {k: v for k, v in zip(keys[:i], values[:i])}
+        clause[key] = {op: values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
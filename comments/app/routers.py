@@ -1,24 +1,202 @@
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from .models import Comment
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pymongo import ReturnDocument
+from .db import client, db
+from .live import STREAM_RETRY_MS, bus, sse_event
+from .models import Comment, CommentCreate, ReactionCreate
+from .pagination import after, decode_cursor, encode_cursor
 from bson import ObjectId
-from typing import List, Optional
+from typing import Dict, List, Optional
+import os
 
 comment_router = APIRouter()
 
-client = AsyncIOMotorClient("mongodb://mongo:27017")
-db = client.comments_db
+# Yanıtta yalnızca Comment alanları okunur (id -> _id)
+COMMENT_PROJECTION = {field: 1 for field in Comment.model_fields if field != "id"}
+MAX_COUNT_IDS = 500
+REACTIONS = set(os.getenv("COMMENT_REACTIONS", "like,love,haha,wow,sad,angry").split(","))
+
+# sort -> (sıralama anahtarları, azalan mı)
+COMMENT_SORTS = {
+    "new": (("created_at", "_id"), True),
+    "top": (("like_count", "_id"), True),
+}
+
+def _comment(doc: dict) -> Comment:
+    return Comment(id=doc.pop("_id"), **doc)
+
+async def _page(response: Response, query: dict, keys, descending: bool, cursor: Optional[str], limit: int) -> List[Comment]:
+    if cursor:
+        query = {**query, **after(keys, decode_cursor(cursor, len(keys)), descending)}
+    direction = -1 if descending else 1
+    docs = await (
+        db.comments.find(query, COMMENT_PROJECTION)
+        .sort([(key, direction) for key in keys])
+        .limit(limit)
+        .to_list(limit)
+    )
+    if len(docs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor([docs[-1][key] for key in keys])
+    return [_comment(doc) for doc in docs]
 
 @comment_router.post("/", response_model=Comment)
-async def create_comment(comment: Comment):
-    comment_dict = comment.dict()
+async def create_comment(comment: CommentCreate):
+    root_id = None
+    if comment.parent_id is not None:
+        parent = await db.comments.find_one({"_id": comment.parent_id}, {"manga_id": 1, "chapter_number": 1, "root_id": 1})
+        if parent is None:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if parent["manga_id"] != comment.manga_id:
+            raise HTTPException(status_code=400, detail="Reply must belong to the same manga")
+        if comment.chapter_number is None:
+            comment.chapter_number = parent.get("chapter_number")  # yanıt konunun bölümünde kalır
+        elif comment.chapter_number != parent.get("chapter_number"):
+            raise HTTPException(status_code=400, detail="Reply must belong to the same chapter")
+        root_id = parent.get("root_id") or parent["_id"]
+
+    db_comment = Comment(**comment.dict(), root_id=root_id)
+    comment_dict = db_comment.dict(exclude={"id"})
     comment_dict["_id"] = str(ObjectId())
-    result = await db.comments.insert_one(comment_dict)
-    if result.inserted_id:
-        return comment
-    raise HTTPException(status_code=400, detail="Comment could not be created")
+    # count/chapters: tüm yorumlar (katalog ve bölüm listesi sayıları);
+    # top_level/chapters_top: X-Total-Count, yalnızca listelenen üst seviye yorumlar
+    counters = {"count": 1}
+    if comment.chapter_number is not None:
+        counters[f"chapters.{comment.chapter_number}"] = 1
+    if comment.parent_id is None:
+        counters["top_level"] = 1
+        if comment.chapter_number is not None:
+            counters[f"chapters_top.{comment.chapter_number}"] = 1
+
+    async def write(session):
+        # Yorum ve sayaçları birlikte yazılır ya da hiçbiri yazılmaz
+        await db.comments.insert_one(comment_dict, session=session)
+        await db.comment_counts.update_one(
+            {"_id": comment.manga_id}, {"$inc": counters}, upsert=True, session=session
+        )
+        if comment.parent_id is not None:
+            await db.comments.update_one({"_id": comment.parent_id}, {"$inc": {"reply_count": 1}}, session=session)
+
+    async with await client.start_session() as session:
+        # Yazma çakışmasında (aynı manganın sayacı) transaction baştan denenir
+        await session.with_transaction(write)
+    db_comment.id = comment_dict["_id"]
+    bus.publish(comment.manga_id, sse_event("comment", db_comment.model_dump_json(), db_comment.id))
+    return db_comment
 
 @comment_router.get("/", response_model=List[Comment])
-async def get_comments(manga_id: int):
-    comments = await db.comments.find({"manga_id": manga_id}).to_list(100)
-    return [Comment(**comment) for comment in comments]
\ No newline at end of file
+async def get_comments(
+    response: Response,
+    manga_id: int,
+    chapter_number: Optional[int] = None,
+    sort: str = Query("new", pattern="^(new|top)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+):
+    # Yalnızca üst seviye yorumlar; yanıtlar /{comment_id}/replies ile açılır
+    query = {"manga_id": manga_id, "parent_id": None}
+    counter = await db.comment_counts.find_one({"_id": manga_id}) or {}
+    if chapter_number is None:
+        total = counter.get("top_level", 0)
+    else:
+        query["chapter_number"] = chapter_number
+        total = counter.get("chapters_top", {}).get(str(chapter_number), 0)
+    response.headers["X-Total-Count"] = str(total)
+    keys, descending = COMMENT_SORTS[sort]
+    return await _page(response, query, keys, descending, cursor, limit)
+
+@comment_router.get("/stream")
+async def stream_comments(manga_id: int, last_event_id: Optional[str] = Header(None)):
+    # Yoklama yerine: yeni yorumlar Server-Sent Events olarak itilir
+    async def events():
+        # Abonelik üreteç içinde: yanıt hiç başlamazsa sızıntı olmaz.
+        # Yeniden bağlanan istemci aradaki olayları kaçırdı; listeyi yeniden çekmeli
+        subscriber = bus.subscribe(manga_id, resync=last_event_id is not None)
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n".encode()
+            while True:
+                yield await subscriber.queue.get()
+        finally:
+            # İstemci kopunca Starlette üreteci iptal eder
+            bus.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@comment_router.get("/counts", response_model=Dict[int, int])
+async def get_comment_counts(manga_ids: str = Query(..., description="Virgülle ayrılmış manga id'leri, örn. 1,2,3")):
+    # Katalog sayfası tüm kutucukların sayısını tek istekte alır (_id indeksi)
+    try:
+        ids = sorted({int(part) for part in manga_ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="manga_ids must be comma separated integers")
+    if len(ids) > MAX_COUNT_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COUNT_IDS} manga ids per request")
+    counts = {manga_id: 0 for manga_id in ids}
+    async for counter in db.comment_counts.find({"_id": {"$in": ids}}):
+        counts[counter["_id"]] = counter["count"]
+    return counts
+
+@comment_router.get("/counts/chapters", response_model=Dict[int, int])
+async def get_chapter_comment_counts(manga_id: int):
+    # Bölüm listesi: tüm bölümlerin sayıları manganın sayaç belgesinden tek okumada
+    counter = await db.comment_counts.find_one({"_id": manga_id}, {"chapters": 1}) or {}
+    chapters = counter.get("chapters", {})
+    return {number: chapters[key] for number, key in sorted((int(key), key) for key in chapters)}
+
+@comment_router.get("/{comment_id}/replies", response_model=List[Comment])
+async def get_replies(
+    comment_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+):
+    # Doğrudan yanıtlar, eskiden yeniye (konuşma sırası)
+    return await _page(response, {"parent_id": comment_id}, ("created_at", "_id"), False, cursor, limit)
+
+@comment_router.post("/{comment_id}/reactions", response_model=Comment)
+async def add_reaction(comment_id: str, reaction: ReactionCreate):
+    if reaction.reaction not in REACTIONS:
+        raise HTTPException(status_code=400, detail="Unknown reaction")
+    if not await db.comments.find_one({"_id": comment_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return await _react(comment_id, reaction.user_id, reaction.reaction, 1)
+
+@comment_router.delete("/{comment_id}/reactions/{reaction}", response_model=Comment)
+async def remove_reaction(comment_id: str, reaction: str, user_id: int):
+    if reaction not in REACTIONS:
+        raise HTTPException(status_code=400, detail="Unknown reaction")
+    return await _react(comment_id, user_id, reaction, -1)
+
+async def _react(comment_id: str, user_id: int, reaction: str, delta: int) -> Comment:
+    key = {"comment_id": comment_id, "user_id": user_id, "reaction": reaction}
+    update = {"$inc": {f"reactions.{reaction}": delta}}
+    if reaction == "like":
+        update["$inc"]["like_count"] = delta  # "top" sıralamasının indeksli alanı
+
+    async def write(session):
+        # Tepki kaydı ve yorumun sayaçları birlikte yazılır ya da hiçbiri yazılmaz
+        if delta > 0:
+            # Kullanıcı başına bir kez; tekrar eden istek sayacı artırmaz
+            result = await db.comment_reactions.update_one(key, {"$setOnInsert": key}, upsert=True, session=session)
+            changed = result.upserted_id is not None
+        else:
+            result = await db.comment_reactions.delete_one(key, session=session)
+            changed = result.deleted_count > 0
+        if not changed:
+            return None
+        return await db.comments.find_one_and_update(
+            {"_id": comment_id}, update, projection=COMMENT_PROJECTION,
+            return_document=ReturnDocument.AFTER, session=session,
+        )
+
+    async with await client.start_session() as session:
+        doc = await session.with_transaction(write)
+    if doc is None:
+        # Değişiklik yoksa sayaç da artırılmaz; yorum olduğu gibi döner
+        doc = await db.comments.find_one({"_id": comment_id}, COMMENT_PROJECTION)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return _comment(doc)
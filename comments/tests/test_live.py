@@ -0,0 +1,134 @@
+"""In-process SSE bus of the comment stream; no MongoDB needed."""
+import asyncio
+
+import pytest
+
+from app import live
+from app.live import HEARTBEAT, RESYNC, CommentBus, sse_event
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _drain(subscriber) -> list:
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+
+def test_sse_event():
+    assert sse_event("comment", '{"a":1}', "42") == b'id: 42\nevent: comment\ndata: {"a":1}\n\n'
+    assert sse_event("comment", "") == b"event: comment\ndata: \n\n"
+    # Çok satırlı veri her satır için ayrı data: alanı olur
+    assert sse_event("x", "a\nb") == b"event: x\ndata: a\ndata: b\n\n"
+
+
+def test_fan_out():
+    async def scenario():
+        bus = CommentBus()
+        first, second = bus.subscribe(1), bus.subscribe(1)
+        other = bus.subscribe(2)
+        frame = sse_event("comment", "{}", "1")
+        bus.publish(1, frame)
+        bus.publish(3, sse_event("comment", "{}", "2"))
+        received, also_received = _drain(first), _drain(second)
+        assert received == also_received == [frame]
+        # Tüm aboneler aynı kodlanmış olayı alır
+        assert received[0] is also_received[0] is frame
+        assert _drain(other) == []
+        assert bus.subscriber_count == 3
+
+    _run(scenario())
+
+
+def test_unsubscribe():
+    async def scenario():
+        bus = CommentBus()
+        kept, gone = bus.subscribe(1), bus.subscribe(1)
+        bus.unsubscribe(gone)
+        bus.unsubscribe(gone)
+        bus.publish(1, b"frame")
+        assert _drain(kept) == [b"frame"]
+        assert _drain(gone) == []
+        bus.unsubscribe(kept)
+        assert bus.subscriber_count == 0
+        assert bus._subscribers == {}
+
+    _run(scenario())
+
+
+def test_slow_subscriber_gets_resync():
+    async def scenario():
+        bus = CommentBus()
+        slow, fast = bus.subscribe(1), bus.subscribe(1)
+        frames = [sse_event("comment", "{}", str(i)) for i in range(live.STREAM_QUEUE_SIZE + 5)]
+        for frame in frames:
+            bus.publish(1, frame)
+            fast.queue.get_nowait()
+        # Kuyruk taşınca birikenler atılır, yerine tek bir resync kalır
+        received = _drain(slow)
+        assert received[0] == RESYNC
+        assert received[1:] == frames[live.STREAM_QUEUE_SIZE + 1:]
+        assert len(received) <= live.STREAM_QUEUE_SIZE
+        # Abone düşürülmez; sonraki olaylar normal akar
+        bus.publish(1, b"next")
+        assert _drain(slow) == [b"next"]
+        assert bus.subscriber_count == 2
+
+    _run(scenario())
+
+
+def test_resync_after_last_event_id():
+    async def scenario():
+        bus = CommentBus()
+        fresh = bus.subscribe(1)
+        reconnected = bus.subscribe(1, resync=True)
+        bus.publish(1, b"frame")
+        assert _drain(fresh) == [b"frame"]
+        assert _drain(reconnected) == [RESYNC, b"frame"]
+
+    _run(scenario())
+
+
+def test_heartbeat_only_for_idle(monkeypatch):
+    monkeypatch.setattr(live, "STREAM_HEARTBEAT", 0.01)
+
+    async def scenario():
+        bus = CommentBus()
+        idle, busy = bus.subscribe(1), bus.subscribe(2)
+        busy.offer(b"frame")
+        assert await asyncio.wait_for(idle.queue.get(), 1) == HEARTBEAT
+        # Son tikten beri olay alan aboneye heartbeat gönderilmez
+        assert _drain(busy) == [b"frame"]
+        assert await asyncio.wait_for(busy.queue.get(), 1) == HEARTBEAT
+        # Bekleyen heartbeat varken yenisi eklenmez
+        await asyncio.wait_for(idle.queue.get(), 1)
+        await asyncio.sleep(0.05)
+        assert _drain(idle) == [HEARTBEAT]
+        bus.unsubscribe(idle)
+        bus.unsubscribe(busy)
+        # Abone kalmayınca zamanlayıcı durur
+        await asyncio.wait_for(bus._heartbeat, 1)
+
+    _run(scenario())
+
+
+@pytest.mark.parametrize("header, expected", [(None, []), ("abc", [RESYNC])])
+def test_stream_resyncs_reconnecting_client(monkeypatch, header, expected):
+    # Rota Last-Event-ID başlığını bus.subscribe'a iletir
+    from app import routers
+
+    async def scenario():
+        bus = CommentBus()
+        monkeypatch.setattr(routers, "bus", bus)
+        response = await routers.stream_comments(1, header)
+        body = response.body_iterator
+        assert (await body.__anext__()).startswith(b"retry: ")
+        subscriber = next(iter(bus._subscribers[1]))
+        assert _drain(subscriber) == expected
+        await body.aclose()
+        assert bus.subscriber_count == 0
+
+    _run(scenario())
@@ -0,0 +1,134 @@
+"""In-process response cache for catalog read endpoints.
+
+Entries are JSON-ready values keyed by route and parameters. They expire
+after ``RESPONSE_CACHE_TTL`` seconds and the least recently used entry is
+evicted once ``RESPONSE_CACHE_SIZE`` is reached. Each entry carries tags
+such as ``manga:12`` or ``categories``; write handlers call
+``invalidate(*tags)`` to drop exactly the entries they make stale.
+
+The cache is per process. Writes served by another process only become
+visible here after the TTL, so keep it short.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Set, Tuple, Union
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+
+Tags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _drop(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._drop(key)
+            self.expirations += 1
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()):
+        if self.ttl <= 0:
+            return
+        if key in self._entries:
+            self._drop(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *tags: str):
+        self._generation += 1
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._tags.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], tags: Tags = ()) -> Any:
+        """Return the cached value or await ``loader()`` once for concurrent misses.
+
+        ``tags`` may be a function of the loaded value, for entries whose
+        tags are only known after the lookup (e.g. a manga found by slug).
+        Exceptions from the loader (such as a 404) are not cached. The load
+        may outlive the caller that started it, so ``loader`` must not use
+        request-scoped resources (see ``database.with_session``).
+        """
+        marker = object()
+        value = self.get(key, marker)
+        if value is not marker:
+            return value
+        pending = self._loading.get(key)
+        if pending is None:
+            # Yükleme ayrı bir görevde: ilk çağıran iptal edilirse (istemci koptu)
+            # bekleyen diğer istekler etkilenmez
+            pending = asyncio.ensure_future(self._load(key, loader, tags))
+            pending.add_done_callback(_retrieve_exception)
+            self._loading[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], tags: Tags) -> Any:
+        generation = self._generation
+        try:
+            value = await loader()
+        finally:
+            self._loading.pop(key, None)
+        # Yükleme sırasında bir yazma olduysa sonuç eski olabilir, saklanmaz
+        if generation == self._generation:
+            self.set(key, value, tags(value) if callable(tags) else tags)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def _retrieve_exception(task: asyncio.Future):
+    # Bekleyen kalmadıysa "exception was never retrieved" uyarısı çıkmasın
+    if not task.cancelled():
+        task.exception()
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,141 @@
+"""In-process category membership index.
+
+Each category maps to a bitmap of manga ids (a Python int with bit ``id``
+set), so AND / OR / NOT across categories are single integer operations
+and a page of results is read straight off the bitmap without joining
+``mangacategorylink``.
+
+The category write handlers update the index in place. It is also rebuilt
+from the database every ``CATEGORY_INDEX_TTL`` seconds so changes made by
+other processes show up.
+"""
+import asyncio
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import select
+
+from .models import Manga, MangaCategoryLink
+
+CATEGORY_INDEX_TTL = float(os.getenv("CATEGORY_INDEX_TTL", "300"))
+
+
+def bit_count(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+def bitmap_of(ids: Iterable[int]) -> int:
+    # Bitler önce bytearray'de toplanır; int'e tek tek OR'lamak her seferinde kopyalar
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for manga_id in ids:
+        buf[manga_id >> 3] |= 1 << (manga_id & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bitmap_page(bitmap: int, offset: int = 0, limit: Optional[int] = None, descending: bool = False) -> List[int]:
+    """Ids set in ``bitmap`` in id order, skipping ``offset`` and returning at most ``limit``."""
+    if bitmap <= 0:
+        return []
+    words = array("Q", bitmap.to_bytes(((bitmap.bit_length() + 63) // 64) * 8, "little"))
+    if array("Q", b"\x01" + b"\x00" * 7)[0] != 1:
+        words.byteswap()  # big-endian makine
+    positions = range(len(words) - 1, -1, -1) if descending else range(len(words))
+    ids: List[int] = []
+    skip = offset
+    for position in positions:
+        word = words[position]
+        if not word:
+            continue
+        ones = bin(word).count("1")
+        if skip >= ones:
+            skip -= ones
+            continue
+        bits = [bit for bit in range(64) if word >> bit & 1]
+        if descending:
+            bits.reverse()
+        for bit in bits[skip:]:
+            ids.append(position * 64 + bit)
+            if limit is not None and len(ids) >= limit:
+                return ids
+        skip = 0
+    return ids
+
+
+class CategoryIndex:
+    def __init__(self, ttl: float = CATEGORY_INDEX_TTL):
+        self.ttl = ttl
+        self._categories: Dict[int, int] = {}
+        self._all = 0
+        self._loaded_at: Optional[float] = None
+        self._changes = 0
+        self._lock = asyncio.Lock()
+
+    async def ensure_fresh(self, session):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            await self.rebuild(session)
+
+    async def rebuild(self, session):
+        changes = self._changes
+        manga_ids = (await session.execute(select(Manga.id))).scalars().all()
+        links = (await session.execute(select(MangaCategoryLink.category_id, MangaCategoryLink.manga_id))).all()
+        members: Dict[int, List[int]] = {}
+        for category_id, manga_id in links:
+            members.setdefault(category_id, []).append(manga_id)
+        self._categories = {category_id: bitmap_of(ids) for category_id, ids in members.items()}
+        self._all = bitmap_of(manga_ids)
+        # Okuma sırasında yerel bir değişiklik olduysa bir sonraki istekte yeniden yükle
+        self._loaded_at = time.monotonic() if changes == self._changes else None
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def set_manga(self, manga_id: int, category_ids: Iterable[int]):
+        """Record the full category list of a created or updated manga."""
+        self._changes += 1
+        bit = 1 << manga_id
+        category_ids = set(category_ids)
+        self._all |= bit
+        for category_id, bitmap in list(self._categories.items()):
+            if category_id not in category_ids and bitmap & bit:
+                self._categories[category_id] = bitmap & ~bit
+        for category_id in category_ids:
+            self._categories[category_id] = self._categories.get(category_id, 0) | bit
+
+    def remove_manga(self, manga_id: int):
+        self.set_manga(manga_id, ())
+        self._all &= ~(1 << manga_id)
+
+    def remove_category(self, category_id: int):
+        self._changes += 1
+        self._categories.pop(category_id, None)
+
+    def query(self, all_of: Iterable[int] = (), any_of: Iterable[int] = (), none_of: Iterable[int] = ()) -> int:
+        """Bitmap of mangas in every ``all_of``, at least one ``any_of`` and no ``none_of`` category."""
+        all_of, any_of, none_of = list(all_of), list(any_of), list(none_of)
+        result = self._all
+        for category_id in all_of:
+            result &= self._categories.get(category_id, 0)
+        if any_of:
+            union = 0
+            for category_id in any_of:
+                union |= self._categories.get(category_id, 0)
+            result &= union
+        for category_id in none_of:
+            result &= ~self._categories.get(category_id, 0)
+        return result
+
+    def page(self, bitmap: int, offset: int = 0, limit: Optional[int] = None,
+             descending: bool = False) -> Tuple[int, List[int]]:
+        return bit_count(bitmap), bitmap_page(bitmap, offset, limit, descending)
+
+
+category_index = CategoryIndex()
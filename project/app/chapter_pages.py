@@ -0,0 +1,197 @@
+"""Reading and editing the ordered page list of a chapter.
+
+Pages live in ``chapter_page`` keyed by ``(chapter_id, page_index)`` with
+contiguous indexes starting at 0. The primary key is checked at the end
+of each statement, so shifting a range of pages is a single UPDATE.
+
+Every edit first locks the chapter row (``SELECT ... FOR UPDATE``), so
+concurrent edits of one chapter run one after the other and never compute
+indexes from a stale page count, and bumps the chapter's ``version`` so
+its ETag changes.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+
+from .models import Chapter, ChapterPage, Manga
+from .storage import get_storage
+
+BULK_INSERT_CHUNK = 1000
+
+
+def page_keys_query(*where, offset: int = 0, limit: Optional[int] = None):
+    query = (
+        select(Chapter.id, ChapterPage.storage_key)
+        .outerjoin(ChapterPage, and_(ChapterPage.chapter_id == Chapter.id, ChapterPage.page_index >= offset))
+        .where(*where)
+        .order_by(ChapterPage.page_index)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+async def read_page_keys(session, *where, offset: int = 0, limit: Optional[int] = None) -> Optional[List[str]]:
+    """Storage keys of the pages of the chapter matching ``where``, or None if there is no such chapter."""
+    rows = (await session.execute(page_keys_query(*where, offset=offset, limit=limit))).all()
+    if not rows:
+        return None
+    return [key for _, key in rows if key is not None]
+
+
+async def read_page_urls(session, *where, offset: int = 0, limit: Optional[int] = None) -> Optional[List[str]]:
+    """Page URLs of the chapter matching ``where``, or None if there is no such chapter."""
+    keys = await read_page_keys(session, *where, offset=offset, limit=limit)
+    if keys is None:
+        return None
+    storage = get_storage()
+    return [storage.url(key) for key in keys]
+
+
+async def lock_chapter(session, chapter_id: int):
+    # Sayfa düzenlemeleri bu satır üzerinden sıraya girer (işlem sonuna kadar)
+    await session.execute(select(Chapter.id).where(Chapter.id == chapter_id).with_for_update())
+
+
+async def touch_chapter(session, chapter_id: int):
+    await session.execute(update(Chapter).where(Chapter.id == chapter_id).values(version=Chapter.version + 1))
+
+
+async def touch_manga(session, manga_id: int):
+    """Bump the manga's version after its chapter list changed."""
+    await session.execute(update(Manga).where(Manga.id == manga_id).values(version=Manga.version + 1))
+
+
+async def replace_pages(session, chapter_id: int, images: List[str]):
+    storage = get_storage()
+    await lock_chapter(session, chapter_id)
+    await session.execute(delete(ChapterPage).where(ChapterPage.chapter_id == chapter_id))
+    if images:
+        await session.execute(
+            insert(ChapterPage),
+            [
+                dict(chapter_id=chapter_id, page_index=index, storage_key=storage.key_for(image))
+                for index, image in enumerate(images)
+            ],
+        )
+    await touch_chapter(session, chapter_id)
+
+
+async def bulk_insert_chapters(session, manga_id: int, chapters: List[dict]) -> Tuple[List[int], List[int]]:
+    """Insert a batch of new chapters of one manga together with their pages.
+
+    Each item holds ``Chapter`` fields (``chapter_number`` required) and
+    ``pages``, a list of ``ChapterPage`` field dicts in page order. Chapter
+    numbers that already exist are left untouched. The whole batch is one
+    multi-row ``INSERT ... ON CONFLICT DO NOTHING`` plus one page insert;
+    the caller commits. Returns ``(created, skipped)`` chapter numbers.
+    """
+    now = datetime.now()
+    batch, skipped = {}, []
+    for chapter in chapters:
+        number = chapter["chapter_number"]
+        if number in batch:
+            skipped.append(number)
+            continue
+        batch[number] = chapter
+
+    ids = {}
+    numbers = list(batch)
+    # Parametre sınırı (32767) aşılmasın diye parça parça
+    for start in range(0, len(numbers), BULK_INSERT_CHUNK):
+        rows = [
+            dict(
+                manga_id=manga_id,
+                chapter_number=number,
+                title=batch[number].get("title") or f"Chapter {number}",
+                release_date=batch[number].get("release_date") or now,
+                is_public=batch[number].get("is_public", True),
+                version=1,
+                updated_at=now,
+            )
+            for number in numbers[start:start + BULK_INSERT_CHUNK]
+        ]
+        result = await session.execute(
+            pg_insert(Chapter)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["manga_id", "chapter_number"])
+            .returning(Chapter.chapter_number, Chapter.id)
+        )
+        ids.update(result.all())
+
+    pages = [
+        dict(page, chapter_id=ids[number], page_index=index)
+        for number in numbers if number in ids
+        for index, page in enumerate(batch[number].get("pages", ()))
+    ]
+    if pages:
+        await session.execute(insert(ChapterPage), pages)
+    if ids:
+        await touch_manga(session, manga_id)
+    created = [number for number in numbers if number in ids]
+    skipped += [number for number in numbers if number not in ids]
+    return created, skipped
+
+
+async def page_count(session, chapter_id: int) -> int:
+    result = await session.execute(
+        select(func.count()).select_from(ChapterPage).where(ChapterPage.chapter_id == chapter_id)
+    )
+    return result.scalar_one()
+
+
+async def insert_page(session, chapter_id: int, image: str, index: Optional[int] = None) -> int:
+    await lock_chapter(session, chapter_id)
+    count = await page_count(session, chapter_id)
+    index = count if index is None else max(0, min(index, count))
+    await session.execute(
+        update(ChapterPage)
+        .where(ChapterPage.chapter_id == chapter_id, ChapterPage.page_index >= index)
+        .values(page_index=ChapterPage.page_index + 1)
+    )
+    session.add(ChapterPage(chapter_id=chapter_id, page_index=index, storage_key=get_storage().key_for(image)))
+    await touch_chapter(session, chapter_id)
+    return index
+
+
+async def delete_page(session, chapter_id: int, index: int) -> bool:
+    await lock_chapter(session, chapter_id)
+    result = await session.execute(
+        delete(ChapterPage)
+        .where(ChapterPage.chapter_id == chapter_id, ChapterPage.page_index == index)
+        .returning(ChapterPage.page_index)
+    )
+    if result.first() is None:
+        return False
+    await session.execute(
+        update(ChapterPage)
+        .where(ChapterPage.chapter_id == chapter_id, ChapterPage.page_index > index)
+        .values(page_index=ChapterPage.page_index - 1)
+    )
+    await touch_chapter(session, chapter_id)
+    return True
+
+
+async def move_page(session, chapter_id: int, index: int, to: int) -> bool:
+    await lock_chapter(session, chapter_id)
+    count = await page_count(session, chapter_id)
+    if not (0 <= index < count and 0 <= to < count):
+        return False
+    if index == to:
+        return True
+    await session.execute(
+        update(ChapterPage)
+        .where(
+            ChapterPage.chapter_id == chapter_id,
+            ChapterPage.page_index.between(min(index, to), max(index, to)),
+        )
+        .values(page_index=case(
+            (ChapterPage.page_index == index, to),
+            else_=ChapterPage.page_index + (-1 if index < to else 1),
+        ))
+    )
+    await touch_chapter(session, chapter_id)
+    return True
@@ -0,0 +1,93 @@
+"""Write-behind view counter for ``manga.read_count``.
+
+Views are counted in memory and flushed every ``READ_COUNT_FLUSH_INTERVAL``
+seconds as a single ``UPDATE ... FROM (VALUES ...)``, so reading a manga
+never locks its row. Deltas are added to the stored value, which keeps
+several app processes flushing into the same table correct.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, column, update, values
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .cache import response_cache
+from .database import engine
+from .models import Manga
+
+logger = logging.getLogger(__name__)
+
+READ_COUNT_FLUSH_INTERVAL = float(os.getenv("READ_COUNT_FLUSH_INTERVAL", "10"))
+
+
+class ReadCounter:
+    def __init__(self, interval: float = READ_COUNT_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending: Dict[int, int] = {}
+        self._flushing: Dict[int, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def hit(self, manga_id: int, count: int = 1):
+        self._pending[manga_id] = self._pending.get(manga_id, 0) + count
+
+    def pending(self, manga_id: int) -> int:
+        return self._pending.get(manga_id, 0) + self._flushing.get(manga_id, 0)
+
+    def current(self, manga: Manga) -> int:
+        return (manga.read_count or 0) + self.pending(manga.id)
+
+    def merge(self, mangas: List[Manga]):
+        """Show unflushed views on loaded rows without marking them dirty."""
+        for manga in mangas:
+            if self.pending(manga.id):
+                set_committed_value(manga, "read_count", self.current(manga))
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            deltas = values(column("id", Integer), column("delta", Integer), name="deltas").data(
+                list(self._flushing.items())
+            )
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        update(Manga)
+                        .where(Manga.id == deltas.c.id)
+                        # Görüntülenme sayısı içerik değişikliği sayılmaz, sürüm aynı kalır
+                        .values(
+                            read_count=Manga.read_count + deltas.c.delta,
+                            version=Manga.version,
+                            updated_at=Manga.updated_at,
+                        )
+                    )
+                response_cache.invalidate(*(f"manga:{manga_id}" for manga_id in self._flushing))
+            except Exception:
+                logger.exception("Could not flush read counts")
+                # Sayılar kaybolmasın, bir sonraki turda tekrar denenir
+                for manga_id, count in self._flushing.items():
+                    self.hit(manga_id, count)
+            finally:
+                self._flushing = {}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+read_counts = ReadCounter()
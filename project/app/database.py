@@ -1,16 +1,64 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
 import os
-from sqlmodel import SQLModel, create_engine
-from sqlmodel.ext.asyncio.session import AsyncSession
+from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Havuz ayarları
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# SQL loglama: "false", "true" (sorgular) veya "debug" (sorgular + sonuç satırları)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower()
+# asyncpg hazır ifade önbellekleri (bağlantı başına)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+# PgBouncer transaction pooling: hazır ifade önbellekleri kapatılır, bağlantı
+# havuzunu PgBouncer yönetir
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+
+def _engine_options() -> dict:
+    options = dict(
+        echo="debug" if DB_ECHO == "debug" else DB_ECHO in ("1", "true", "yes"),
+        future=True,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if DB_PGBOUNCER:
+        options.update(
+            poolclass=NullPool,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                # Aynı isimli ifade başka bir sunucu bağlantısında kalmış olabilir
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        )
+    else:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            connect_args={
+                "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
+            },
+        )
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **_engine_options())
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
@@ -18,9 +66,33 @@ async def init_db():
 
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
         yield session
 
+
+async def with_session(loader, *args):
+    """Run ``loader(session, *args)`` in a session of its own.
+
+    For ``response_cache`` loaders: the load is shared by concurrent
+    requests and outlives a cancelled caller, so it must not use the
+    session of the request that started it (closed when that request ends).
+    """
+    async with async_session() as session:
+        return await loader(session, *args)
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    if isinstance(pool, NullPool):
+        return {"pool": "null", "pgbouncer": DB_PGBOUNCER}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout": DB_POOL_TIMEOUT,
+        "recycle": DB_POOL_RECYCLE,
+        "pre_ping": DB_POOL_PRE_PING,
+    }
@@ -0,0 +1,35 @@
+"""Fast path for large list responses.
+
+Big lists (a 2,000 chapter series, a full catalogue page) spend most of
+their time building ORM objects and validating them against the
+``response_model`` one by one. The handlers here select plain column
+tuples instead and hand the dicts straight to orjson. The ``response_model``
+stays on the route for the OpenAPI schema but is not applied to the
+returned response.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def model_columns(model, read_model, exclude: Iterable[str] = ()) -> list:
+    """Columns of ``model`` for the fields of ``read_model``, in field order.
+
+    Keeping the field order makes the JSON identical to what the
+    ``response_model`` serializer produced.
+    """
+    exclude = set(exclude)
+    return [getattr(model, name).label(name) for name in read_model.model_fields if name not in exclude]
+
+
+def row_dicts(rows, keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    if keys is None:
+        keys = list(rows.keys())
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    # Dönen Response doğrudan kullanılır; enjekte edilen response'un başlıkları taşınmalı
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, headers=headers)
@@ -0,0 +1,71 @@
+"""HTTP conditional request helpers (ETag / Last-Modified / 304).
+
+Handlers compute the validators from a row's ``version`` and
+``updated_at``; when the client already has the current representation
+they answer 304 before building the response body.
+
+Both validators must describe the same state. Volatile counters such as
+``read_count`` do not move ``updated_at`` (see ``counters.py``), so they
+are kept out of the ETag as well; responses that carry one use a weak
+ETag, since a newer count alone does not make the cached copy wrong.
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def _http_date(value: datetime) -> datetime:
+    # Veritabanındaki zamanlar yerel saat (datetime.now), saniyeye yuvarlanır
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def has_validators(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match varsa If-Modified-Since dikkate alınmaz (RFC 9110)
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Zayıf karşılaştırma (RFC 9110 8.8.3.2): W/ öneki yok sayılır
+        strong = etag[2:] if etag.startswith("W/") else etag
+        return "*" in tags or strong in tags or f"W/{strong}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _http_date(last_modified) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, max_age: int = HTTP_CACHE_MAX_AGE) -> dict:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_http_date(last_modified), usegmt=True)
+    return headers
+
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Return a 304 response if the client is up to date, otherwise add the headers to ``response``."""
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
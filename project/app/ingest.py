@@ -0,0 +1,427 @@
+"""Chapter ingestion pipeline for ZIP uploads.
+
+The upload is spooled to disk and processed in overlapping stages:
+
+    archive scan -> decode + hash -> WebP transcode (process pool, new images only)
+    -> upload (bounded queue)
+    -> batched DB commit
+
+so CPU, network and database work run concurrently and the event loop is
+never blocked by Pillow or storage I/O.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from natsort import natsorted
+from PIL import Image
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from .cache import response_cache
+from .chapter_pages import bulk_insert_chapters
+from .models import Chapter, ImageBlob
+from .renditions import EAGER_RENDITIONS, Rendition, render_image, rendition_key
+from .storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+TRANSCODE_WORKERS = int(os.getenv("INGEST_TRANSCODE_WORKERS", os.cpu_count() or 2))
+UPLOAD_WORKERS = int(os.getenv("INGEST_UPLOAD_WORKERS", "4"))
+UPLOAD_QUEUE_SIZE = int(os.getenv("INGEST_UPLOAD_QUEUE_SIZE", "16"))
+UPLOAD_BATCH_SIZE = int(os.getenv("INGEST_UPLOAD_BATCH_SIZE", "8"))
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR") or None
+SPOOL_CHUNK_SIZE = 1024 * 1024
+WEBP_QUALITY = 80
+
+
+@dataclass
+class ArchiveChapter:
+    number: int
+    folder: str
+    pages: List[str]
+
+
+@dataclass
+class TranscodedPage:
+    data: bytes
+    width: int
+    height: int
+    content_hash: str
+    renditions: List[Tuple[Rendition, bytes]] = field(default_factory=list)
+
+
+@dataclass
+class ChapterProgress:
+    chapter_number: int
+    total_pages: int
+    stored_pages: int = 0
+    failed_pages: int = 0
+    status: str = "pending"  # pending, uploading, committed, skipped, failed
+    error: Optional[str] = None
+    pages: Dict[int, dict] = field(default_factory=dict)  # archive page index -> ChapterPage fields
+
+
+ProgressCallback = Callable[[ChapterProgress], Awaitable[None]]
+
+
+async def spool_upload(upload: UploadFile, directory: Optional[str] = SPOOL_DIR) -> str:
+    """Copy an uploaded file to a temp file on disk in fixed-size chunks."""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".zip", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def scan_archive(zip_path: str) -> List[ArchiveChapter]:
+    """List chapter folders and their page entries without reading any image data."""
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        names = zip_ref.namelist()
+
+    chapters: Dict[int, ArchiveChapter] = {}
+    for folder in natsorted(f for f in names if f.endswith('/')):
+        match = re.search(r'\d+', folder)
+        if not match:
+            continue
+        number = int(match.group())
+        if number in chapters:
+            continue
+        pages = natsorted(
+            [f for f in names if f.startswith(folder) and not f.endswith('/')],
+            key=lambda x: x.lower()
+        )
+        chapters[number] = ArchiveChapter(number=number, folder=folder, pages=pages)
+    return list(chapters.values())
+
+
+# Each transcode worker process keeps the archive it is working on open.
+_worker_archive = None
+
+
+def _open_archive(zip_path: str) -> zipfile.ZipFile:
+    global _worker_archive
+    if _worker_archive is None or _worker_archive[0] != zip_path:
+        if _worker_archive is not None:
+            _worker_archive[1].close()
+        _worker_archive = (zip_path, zipfile.ZipFile(zip_path))
+    return _worker_archive[1]
+
+
+def _decode(zip_path: str, entry: str) -> Image.Image:
+    image = Image.open(io.BytesIO(_open_archive(zip_path).read(entry)))
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def image_digest(image: Image.Image) -> str:
+    """Hash of the decoded pixels, so the same picture matches whatever file it came from."""
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def hash_page(zip_path: str, entry: str) -> str:
+    """Decode one archive entry and hash it. Runs in a worker process."""
+    return image_digest(_decode(zip_path, entry))
+
+
+def transcode_page(zip_path: str, entry: str, quality: int = WEBP_QUALITY,
+                   renditions: Tuple[Rendition, ...] = ()) -> TranscodedPage:
+    """Decode one archive entry and re-encode it as WebP, plus any eager renditions. Runs in a worker process."""
+    image = _decode(zip_path, entry)
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=quality)
+    data = out.getvalue()
+    return TranscodedPage(
+        data=data, width=image.width, height=image.height, content_hash=image_digest(image),
+        renditions=[(rendition, render_image(image, rendition)) for rendition in renditions],
+    )
+
+
+def blob_key(content_hash: str) -> str:
+    return f"blobs/{content_hash[:2]}/{content_hash}.webp"
+
+
+_transcode_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_transcode_executor() -> ProcessPoolExecutor:
+    global _transcode_executor
+    if _transcode_executor is None:
+        _transcode_executor = ProcessPoolExecutor(
+            max_workers=TRANSCODE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _transcode_executor
+
+
+def shutdown_transcode_executor():
+    global _transcode_executor
+    if _transcode_executor is not None:
+        _transcode_executor.shutdown(wait=False, cancel_futures=True)
+        _transcode_executor = None
+
+
+class ChapterIngestPipeline:
+    """Ingest every new chapter of a spooled ZIP archive for one manga.
+
+    Pages are transcoded in ``executor`` and handed to ``upload_workers``
+    uploader tasks through a bounded queue; each uploader drains up to
+    ``UPLOAD_BATCH_SIZE`` pages at a time into ``storage.put_many``. The number of pages held in
+    memory is capped, so a large archive never has to fit in RAM. Chapters
+    are committed as soon as all of their pages are stored; chapters that
+    finish while a commit is running go into the next one, so a large
+    archive costs a handful of transactions rather than one per chapter.
+
+    Every page is first decoded and hashed. Pictures already in
+    ``image_blob`` (credit pages, banners) are not transcoded or uploaded
+    again; the chapter just points at the stored object.
+
+    ``resume`` maps chapter numbers to pages already stored by an earlier
+    attempt; those pages are not transcoded or uploaded again.
+    """
+
+    def __init__(
+        self,
+        session,
+        manga_id: int,
+        zip_path: str,
+        storage: Optional[StorageBackend] = None,
+        executor: Optional[Executor] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        resume: Optional[Dict[int, Dict[int, dict]]] = None,
+        upload_workers: int = UPLOAD_WORKERS,
+        queue_size: int = UPLOAD_QUEUE_SIZE,
+    ):
+        self.session = session
+        self.manga_id = manga_id
+        self.zip_path = zip_path
+        self.storage = storage or get_storage()
+        self.executor = executor or get_transcode_executor()
+        self.on_progress = on_progress
+        self.resume = resume or {}
+        self.upload_workers = upload_workers
+        self.queue_size = queue_size
+        self.progress: Dict[int, ChapterProgress] = {}
+        self._db_lock = asyncio.Lock()
+        self._ready: List[ChapterProgress] = []
+        # content_hash -> sayfa alanları, ya da yüklemesi süren görselin Future'ı
+        self._blobs: Dict[str, object] = {}
+        self._new_blobs: List[dict] = []
+        self._in_flight = asyncio.Semaphore(TRANSCODE_WORKERS + queue_size + upload_workers)
+
+    async def run(self) -> List[ChapterProgress]:
+        chapters = await asyncio.to_thread(scan_archive, self.zip_path)
+        result = await self.session.execute(
+            select(Chapter.chapter_number).where(Chapter.manga_id == self.manga_id)
+        )
+        existing = set(result.scalars().all())
+
+        todo = []
+        for chapter in chapters:
+            progress = ChapterProgress(chapter_number=chapter.number, total_pages=len(chapter.pages))
+            progress.pages = dict(self.resume.get(chapter.number, {}))
+            progress.stored_pages = len(progress.pages)
+            self.progress[chapter.number] = progress
+            if chapter.number in existing:
+                progress.status = "skipped"
+                await self._report(progress)
+            else:
+                todo.append(chapter)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        workers = [asyncio.create_task(self._upload_worker(queue)) for _ in range(self.upload_workers)]
+        try:
+            await asyncio.gather(*(self._ingest_chapter(chapter, queue) for chapter in todo))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return [self.progress[chapter.number] for chapter in chapters]
+
+    async def _report(self, progress: ChapterProgress, page: bool = False):
+        if not page:
+            logger.info(
+                "manga %s chapter %s: %s (%s/%s pages)",
+                self.manga_id, progress.chapter_number, progress.status,
+                progress.stored_pages, progress.total_pages,
+            )
+        if self.on_progress is not None:
+            await self.on_progress(progress)
+
+    async def _upload_worker(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < UPLOAD_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await asyncio.to_thread(self.storage.put_many, [(key, data) for data, key, _ in batch])
+            except Exception as e:
+                for _, _, done in batch:
+                    done.set_exception(e)
+            else:
+                for _, _, done in batch:
+                    done.set_result(None)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _ingest_page(self, progress: ChapterProgress, index: int, entry: str, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        # Karma, kodlama ve yükleme aynı yuvada: sayfalar arşiv sırasıyla ilerler,
+        # havuza bir seferde en fazla _in_flight kadar iş gider
+        async with self._in_flight:
+            try:
+                content_hash = await loop.run_in_executor(self.executor, hash_page, self.zip_path, entry)
+            except Exception as e:
+                # Bozuk resim: sayfa atlanır, bölüm yine de kaydedilir
+                logger.warning("Could not decode %s: %s", entry, e)
+                progress.failed_pages += 1
+                return
+            if content_hash not in self._blobs:
+                await self._lookup_blob(content_hash)
+            page = self._blobs.get(content_hash)
+            if page is None:
+                page = await self._store_blob(entry, content_hash, queue)
+        try:
+            page = await page if isinstance(page, asyncio.Future) else page
+        except Exception as e:
+            progress.error = str(e)
+            return
+        if page is None:
+            progress.failed_pages += 1
+            return
+        progress.pages[index] = dict(page)
+        progress.stored_pages += 1
+        await self._report(progress, page=True)
+
+    async def _lookup_blob(self, content_hash: str):
+        # Daha önce saklanmış görseller kodlanmaz ve yüklenmez
+        async with self._db_lock:
+            blob = await self.session.get(ImageBlob, content_hash)
+        if blob is not None:
+            self._blobs.setdefault(content_hash, dict(
+                storage_key=blob.storage_key,
+                width=blob.width,
+                height=blob.height,
+                byte_size=blob.byte_size,
+                content_hash=blob.content_hash,
+            ))
+
+    async def _store_blob(self, entry: str, content_hash: str, queue: asyncio.Queue) -> asyncio.Future:
+        """Transcode and upload a picture not stored yet; other pages with the same hash wait for it.
+
+        The caller holds an ``_in_flight`` slot.
+        """
+        loop = asyncio.get_running_loop()
+        stored = self._blobs[content_hash] = loop.create_future()
+        key = blob_key(content_hash)
+        try:
+            page = await loop.run_in_executor(
+                self.executor, transcode_page, self.zip_path, entry, WEBP_QUALITY, EAGER_RENDITIONS
+            )
+        except Exception as e:
+            logger.warning("Could not transcode %s: %s", entry, e)
+            stored.set_result(None)
+            return stored
+        done = loop.create_future()
+        await queue.put((page.data, key, done))
+        try:
+            await done
+            for rendition, data in page.renditions:
+                await asyncio.to_thread(
+                    self.storage.put, rendition_key(key, rendition), data, rendition.content_type
+                )
+        except Exception as e:
+            logger.warning("Could not upload %s: %s", key, e)
+            # Sonraki deneme yeniden yükleyebilsin
+            del self._blobs[content_hash]
+            stored.set_exception(RuntimeError(f"Could not upload {key}: {e}"))
+            stored.exception()  # bekleyen yoksa uyarı basılmasın
+            return stored
+        blob = dict(
+            storage_key=key,
+            width=page.width,
+            height=page.height,
+            byte_size=len(page.data),
+            content_hash=content_hash,
+        )
+        self._new_blobs.append(blob)
+        self._blobs[content_hash] = blob
+        stored.set_result(blob)
+        return stored
+
+    async def _ingest_chapter(self, chapter: ArchiveChapter, queue: asyncio.Queue):
+        progress = self.progress[chapter.number]
+        progress.status = "uploading"
+        await self._report(progress)
+
+        await asyncio.gather(
+            *(self._ingest_page(progress, index, entry, queue)
+              for index, entry in enumerate(chapter.pages) if index not in progress.pages)
+        )
+        if progress.error:
+            # Yükleme hatası: eksik bölüm kaydedilmez, iş tekrar denenebilir
+            progress.status = "failed"
+            await self._report(progress)
+            return
+
+        self._ready.append(progress)
+        await self._commit_ready()
+
+    async def _commit_ready(self):
+        # Bir commit sürerken hazır olan bölümler bir sonraki toplu commit'e girer
+        async with self._db_lock:
+            batch, self._ready = self._ready, []
+            if not batch:
+                return
+            chapters = [
+                dict(
+                    chapter_number=progress.chapter_number,
+                    pages=[progress.pages[index] for index in sorted(progress.pages)],
+                )
+                for progress in batch
+            ]
+            blobs, self._new_blobs = self._new_blobs, []
+            try:
+                if blobs:
+                    await self.session.execute(insert(ImageBlob).on_conflict_do_nothing(), blobs)
+                created, _ = await bulk_insert_chapters(self.session, self.manga_id, chapters)
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                self._new_blobs += blobs
+                for progress in batch:
+                    progress.status = "failed"
+                    progress.error = str(e)
+            else:
+                created = set(created)
+                for progress in batch:
+                    # Bu arada başka bir yükleme aynı bölümü eklemiş olabilir
+                    progress.status = "committed" if progress.chapter_number in created else "skipped"
+                if created:
+                    response_cache.invalidate(f"chapters:{self.manga_id}", "latest-chapters")
+        for progress in batch:
+            await self._report(progress)
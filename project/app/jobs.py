@@ -0,0 +1,275 @@
+"""Background worker pool for bulk chapter uploads.
+
+Jobs are rows in ``upload_job``; workers claim them with
+``FOR UPDATE SKIP LOCKED`` so several app processes can share the queue.
+The uploaded archive is spooled to local disk, so a job is only claimed
+by processes of the node that staged it (``UPLOAD_JOB_NODE``, the host
+name by default); processes on other hosts or containers skip it. Jobs
+queued before the node was recorded have none and can run anywhere.
+Per-chapter progress, including the pages already stored, is written to
+``upload_job_chapter`` while the job runs, which lets a failed or
+interrupted job resume from the last recorded page.
+
+Archives are deleted when their job completes. A failed job keeps its
+archive for ``UPLOAD_JOB_ARCHIVE_RETENTION`` seconds so it can be resumed,
+then the sweeper marks it ``expired`` and deletes the file, together with
+spooled files no job refers to any more (e.g. of deleted mangas).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database import async_session
+from .ingest import ChapterIngestPipeline, ChapterProgress
+from .models import UploadJob, UploadJobChapter
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("UPLOAD_JOB_POLL_INTERVAL", "5"))
+JOB_STALE_AFTER = int(os.getenv("UPLOAD_JOB_STALE_AFTER", "300"))
+JOB_NODE = os.getenv("UPLOAD_JOB_NODE") or socket.gethostname()
+JOB_SPOOL_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.join(tempfile.gettempdir(), "manga_upload_jobs"))
+JOB_ARCHIVE_RETENTION = int(os.getenv("UPLOAD_JOB_ARCHIVE_RETENTION", str(7 * 24 * 3600)))
+JOB_SWEEP_INTERVAL = int(os.getenv("UPLOAD_JOB_SWEEP_INTERVAL", "3600"))
+# Yeni yüklenen arşivin işi henüz yazılmamış olabilir
+JOB_SPOOL_GRACE = 3600
+HEARTBEAT_INTERVAL = 30
+PROGRESS_FLUSH_PAGES = 10
+
+
+def on_this_node():
+    return or_(UploadJob.node == JOB_NODE, UploadJob.node.is_(None))
+
+
+def next_job_query():
+    return (
+        select(UploadJob.id)
+        .where(UploadJob.status == "queued", on_this_node())
+        .order_by(UploadJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def remove_archive(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def sweep_archives():
+    """Expire failed jobs past the retention and delete spooled archives no job needs."""
+    async with async_session() as session:
+        await session.execute(
+            update(UploadJob)
+            .where(
+                on_this_node(),
+                UploadJob.status == "failed",
+                UploadJob.updated_at < datetime.now() - timedelta(seconds=JOB_ARCHIVE_RETENTION),
+            )
+            .values(status="expired", updated_at=datetime.now())
+        )
+        result = await session.execute(
+            select(UploadJob.archive_path).where(UploadJob.status.in_(("queued", "running", "failed")))
+        )
+        needed = set(result.scalars().all())
+        await session.commit()
+    if not os.path.isdir(JOB_SPOOL_DIR):
+        return
+    cutoff = time.time() - JOB_SPOOL_GRACE
+    for entry in os.scandir(JOB_SPOOL_DIR):
+        if entry.is_file() and entry.path not in needed and entry.stat().st_mtime < cutoff:
+            logger.info("Removing upload archive %s", entry.path)
+            remove_archive(entry.path)
+
+
+class JobProgressWriter:
+    """Pipeline progress callback that persists chapter progress for one job.
+
+    Page-level progress is batched: a chapter row is rewritten when its status
+    changes or every ``PROGRESS_FLUSH_PAGES`` stored pages.
+    """
+
+    def __init__(self, session: AsyncSession, job_id: int, rows: List[UploadJobChapter]):
+        self.session = session
+        self.job_id = job_id
+        self._committed = {row.chapter_number for row in rows if row.status == "committed"}
+        self._latest: Dict[int, ChapterProgress] = {}
+        self._flushed: Dict[int, tuple] = {}
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, progress: ChapterProgress):
+        # Bir önceki denemede kaydedilen bölüm bu sefer "skipped" görünür
+        if progress.status == "skipped" and progress.chapter_number in self._committed:
+            return
+        self._latest[progress.chapter_number] = progress
+        last = self._flushed.get(progress.chapter_number)
+        if last and last[0] == progress.status and progress.stored_pages - last[1] < PROGRESS_FLUSH_PAGES:
+            return
+        await self._write([progress])
+
+    async def flush(self):
+        pending = [
+            progress for number, progress in self._latest.items()
+            if self._flushed.get(number) != (progress.status, progress.stored_pages, progress.failed_pages)
+        ]
+        await self._write(pending)
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self._write([])
+
+    async def finish(self, status: str, error: Optional[str] = None):
+        await self.flush()
+        async with self._lock:
+            await self.session.execute(
+                update(UploadJob)
+                .where(UploadJob.id == self.job_id)
+                .values(status=status, error=error, updated_at=datetime.now())
+            )
+            await self.session.commit()
+
+    async def _write(self, chapters: List[ChapterProgress]):
+        async with self._lock:
+            for progress in chapters:
+                self._flushed[progress.chapter_number] = (
+                    progress.status, progress.stored_pages, progress.failed_pages
+                )
+                values = dict(
+                    total_pages=progress.total_pages,
+                    stored_pages=progress.stored_pages,
+                    failed_pages=progress.failed_pages,
+                    status=progress.status,
+                    error=progress.error,
+                    pages=json.dumps(progress.pages),
+                )
+                stmt = insert(UploadJobChapter).values(
+                    job_id=self.job_id, chapter_number=progress.chapter_number, **values
+                )
+                await self.session.execute(
+                    stmt.on_conflict_do_update(index_elements=["job_id", "chapter_number"], set_=values)
+                )
+            await self.session.execute(
+                update(UploadJob).where(UploadJob.id == self.job_id).values(updated_at=datetime.now())
+            )
+            await self.session.commit()
+
+
+class UploadJobWorkers:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Could not claim upload job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._process(*job)
+
+    async def _sweep(self):
+        while True:
+            try:
+                await sweep_archives()
+            except Exception:
+                logger.exception("Could not sweep upload archives")
+            await asyncio.sleep(JOB_SWEEP_INTERVAL)
+
+    async def _claim(self):
+        async with async_session() as session:
+            # Çöken bir işçinin bıraktığı işleri tekrar kuyruğa al
+            await session.execute(
+                update(UploadJob)
+                .where(
+                    on_this_node(),
+                    UploadJob.status == "running",
+                    UploadJob.updated_at < datetime.now() - timedelta(seconds=JOB_STALE_AFTER),
+                )
+                .values(status="queued")
+            )
+            next_job = next_job_query().scalar_subquery()
+            result = await session.execute(
+                update(UploadJob)
+                .where(UploadJob.id == next_job)
+                .values(status="running", attempts=UploadJob.attempts + 1, updated_at=datetime.now())
+                .returning(UploadJob.id, UploadJob.manga_id, UploadJob.archive_path)
+            )
+            job = result.first()
+            await session.commit()
+            return job
+
+    async def _process(self, job_id: int, manga_id: int, archive_path: str):
+        async with async_session() as session, async_session() as progress_session:
+            result = await progress_session.exec(
+                select(UploadJobChapter).where(UploadJobChapter.job_id == job_id)
+            )
+            rows = result.all()
+            resume = {
+                row.chapter_number: {int(index): page for index, page in json.loads(row.pages).items()}
+                for row in rows
+            }
+            writer = JobProgressWriter(progress_session, job_id, rows)
+            heartbeat = asyncio.create_task(writer.heartbeat())
+            status, error = "completed", None
+            try:
+                pipeline = ChapterIngestPipeline(
+                    session, manga_id, archive_path, on_progress=writer, resume=resume
+                )
+                chapters = await pipeline.run()
+                failed = [progress.chapter_number for progress in chapters if progress.status == "failed"]
+                if failed:
+                    status, error = "failed", f"Chapters failed: {failed}"
+            except asyncio.CancelledError:
+                # Kapanışta yarım kalan iş bir sonraki başlangıçta devam eder
+                await writer.finish("queued")
+                raise
+            except Exception as e:
+                logger.exception("Upload job %s failed", job_id)
+                status, error = "failed", str(e)
+            finally:
+                heartbeat.cancel()
+
+            await writer.finish(status, error)
+            if status == "completed":
+                remove_archive(archive_path)
+            logger.info("Upload job %s %s", job_id, status)
+
+
+upload_jobs = UploadJobWorkers()
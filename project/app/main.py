@@ -1,12 +1,21 @@
 from fastapi import Depends, FastAPI
+from sqlalchemy import text
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session, init_db
-from app.routers import manga, chapter, category
+from app.database import get_session, init_db, pool_status
+from app.cache import response_cache
+from app.counters import read_counts
+from app.ingest import shutdown_transcode_executor
+from app.jobs import upload_jobs
+from app.storage import LocalStorage, close_storage, get_storage
+from app.routers import manga, chapter, category, jobs, renditions
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.logger import logger
 import logging
+import os
 
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -34,17 +43,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Total-Count"], 
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 app.include_router(manga.router)
 app.include_router(chapter.router)
 app.include_router(category.router)
+app.include_router(jobs.router)
+app.include_router(renditions.router)
+
+# Yerel depolama kullanılıyorsa sayfaları uygulama üzerinden sun
+storage = get_storage()
+if isinstance(storage, LocalStorage) and storage.base_url.startswith("/"):
+    os.makedirs(storage.root, exist_ok=True)
+    app.mount(storage.base_url, StaticFiles(directory=storage.root), name="media")
+
+@app.on_event("startup")
+async def startup():
+    upload_jobs.start()
+    read_counts.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await read_counts.stop()
+    await upload_jobs.stop()
+    shutdown_transcode_executor()
+    close_storage()
 
 @app.get("/ping")
 async def pong():
     return {"ping": "pong!"}
 
+@app.get("/health")
+async def health(session: AsyncSession = Depends(get_session)):
+    try:
+        await session.execute(text("SELECT 1"))
+    except Exception:
+        # Hata metni bağlantı ayrıntısı içerebilir; yalnızca loga yazılır
+        logger.exception("Health check could not reach the database")
+        return JSONResponse(status_code=503, content={"status": "error", "database": "unavailable", "pool": pool_status()})
+    return {"status": "ok", "database": "ok", "pool": pool_status()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
@@ -1,5 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship,UniqueConstraint
-from typing import Optional, List
+from sqlalchemy import Column, Computed, ForeignKey, Index, Integer, PrimaryKeyConstraint, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from typing import Optional, List, Dict
 from datetime import date
 from datetime import datetime
 import hashlib
@@ -32,6 +34,8 @@ class UserUpdate(SQLModel):
     is_admin: Optional[bool] = None
 
 class MangaCategoryLink(SQLModel, table=True):
+    # PK (manga_id, category_id); kategori sayfası ters yönden arar
+    __table_args__ = (Index('ix_mangacategorylink_category_manga', 'category_id', 'manga_id'),)
     manga_id: int = Field(foreign_key="manga.id", primary_key=True)
     category_id: int = Field(foreign_key="category.id", primary_key=True)
 
@@ -53,7 +57,16 @@ class MangaBase(SQLModel):
 
 
 class Manga(MangaBase, table=True):
+    # /manga/ keyset sayfalama sıralamaları (bkz. MANGA_SORTS)
+    __table_args__ = (
+        Index('ix_manga_title', 'title', 'id'),
+        Index('ix_manga_read_count', 'read_count', 'id'),
+    )
     id: int = Field(default=None, primary_key=True)
+    # ETag / Last-Modified için; her UPDATE'te otomatik artar (read_count flush hariç)
+    version: int = Field(default=1, sa_column_kwargs={"onupdate": literal_column("version") + 1})
+    updated_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now})
+    last_chapter_at: Optional[datetime] = None  # chapter tetikleyicisi günceller
     chapters: List["Chapter"] = Relationship(back_populates="manga")
     categories: List["Category"] = Relationship(
         back_populates="mangas",
@@ -62,6 +75,39 @@ class Manga(MangaBase, table=True):
     
 
 
+# Arama için tsvector sütunu. Veritabanı hesaplar; ORM'e alan olarak eklenmez,
+# yoksa INSERT'lerde NULL gönderilmeye çalışılır. Dil karışık olduğundan 'simple'.
+Manga.__table__.append_column(Column(
+    'search_vector',
+    TSVECTOR,
+    Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(author, '') || ' ' || coalesce(artist, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(genre, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'D')",
+        persisted=True,
+    ),
+))
+Index('ix_manga_search_vector', Manga.__table__.c.search_vector, postgresql_using='gin')
+# Yazım hatası toleranslı arama (pg_trgm gerekir)
+Index('ix_manga_title_trgm', Manga.title, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+# /manga/ sıralama ifadeleri. NULL'lar coalesce ile sona düşer ve keyset
+# karşılaştırması çalışır; sabitler literal ki indeks ifadesiyle eşleşsin.
+MANGA_RATING_SORT = func.coalesce(Manga.rating, literal_column("-1"))
+MANGA_YEAR_SORT = func.coalesce(Manga.year, literal_column("0"))
+MANGA_LATEST_SORT = func.coalesce(Manga.last_chapter_at, literal_column("'1970-01-01'::timestamp"))
+Index('ix_manga_rating_sort', MANGA_RATING_SORT, Manga.id)
+Index('ix_manga_year_sort', MANGA_YEAR_SORT, Manga.id)
+Index('ix_manga_latest_sort', MANGA_LATEST_SORT, Manga.id)
+
+class MangaFacet(SQLModel, table=True):
+    """Katalog filtre sayıları; manga ve mangacategorylink tetikleyicileri günceller."""
+    __tablename__ = "manga_facet"
+    dimension: str = Field(primary_key=True)  # language, genre, status, publisher, year, category
+    value: str = Field(primary_key=True)
+    count: int = 0
+
 class MangaCreate(MangaBase):
     category_ids: List[int] = []
 
@@ -70,6 +116,13 @@ class MangaRead(MangaBase):
     categories: List["CategoryRead"]
 
     
+class MangaPage(SQLModel):
+    items: List[MangaRead]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    facets: Dict[str, Dict[str, int]] = {}
+
+    
 class MangaUpdate(SQLModel):
     title: Optional[str] = None
     author: Optional[str] = None
@@ -92,24 +145,86 @@ class ChapterBase(SQLModel):
     manga_id: int = Field(foreign_key="manga.id")
     release_date: Optional[datetime] = Field(default_factory=datetime.now)  # V
     is_public: bool = True
-    images: str = "[]"  # JSON formatında resim yolları veya base64 kodları
 
 class Chapter(ChapterBase, table=True):
     __tablename__ = "chapter"
     __table_args__ = (UniqueConstraint('manga_id', 'chapter_number', name='uq_manga_chapter'),)
     id: int = Field(default=None, primary_key=True)
+    version: int = Field(default=1, sa_column_kwargs={"onupdate": literal_column("version") + 1})
+    updated_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now})
     manga: Manga = Relationship(back_populates="chapters")
+    pages: List["ChapterPage"] = Relationship(
+        back_populates="chapter",
+        sa_relationship_kwargs={
+            "order_by": "ChapterPage.page_index",
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        },
+    )
 
-    def get_images(self) -> List[str]:
-        import json
-        return json.loads(self.images)
+class LatestUpdate(SQLModel, table=True):
+    """Ana sayfa akışı: manga başına en yeni bölüm, başlıklarıyla birlikte.
+
+    chapter ve manga tetikleyicileri günceller (bkz. latest_update migration'ı).
+    """
+    __tablename__ = "latest_update"
+    __table_args__ = (Index('ix_latest_update_release_date', 'release_date', 'manga_id'),)
+    manga_id: int = Field(sa_column=Column(Integer, ForeignKey("manga.id", ondelete="CASCADE"), primary_key=True))
+    chapter_id: int
+    chapter_number: int
+    title: str
+    release_date: datetime
+    is_public: bool = True
+    manga_title: str
+    manga_slug: Optional[str] = None
+    cover_image: Optional[str] = None
 
-    def set_images(self, images: List[str]):
-        import json
-        self.images = json.dumps(images)
+class ChapterPage(SQLModel, table=True):
+    __tablename__ = "chapter_page"
+    # Sayfa kaydırma (page_index +/- 1) tek UPDATE ile yapılabilsin diye
+    # birincil anahtar ifade sonunda kontrol edilir
+    __table_args__ = (
+        PrimaryKeyConstraint('chapter_id', 'page_index', deferrable=True, initially='IMMEDIATE'),
+        # /renditions yalnızca kayıtlı sayfaları üretir (routers/renditions.py)
+        Index('ix_chapter_page_storage_key', 'storage_key'),
+    )
+    chapter_id: int = Field(sa_column=Column(Integer, ForeignKey("chapter.id", ondelete="CASCADE"), primary_key=True))
+    page_index: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=False))
+    storage_key: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    byte_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    chapter: Optional[Chapter] = Relationship(back_populates="pages")
+
+class ImageBlob(SQLModel, table=True):
+    """Depolanan her görsel bir kez; anahtar çözülmüş piksellerin özeti.
+
+    Aynı kredi/banner sayfası binlerce bölümde tekrar eder, hepsi aynı
+    nesneyi gösterir (chapter_page.content_hash).
+    """
+    __tablename__ = "image_blob"
+    __table_args__ = (Index('ix_image_blob_storage_key', 'storage_key'),)
+    content_hash: str = Field(primary_key=True)
+    storage_key: str
+    width: int
+    height: int
+    byte_size: int
+    created_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"server_default": func.now()})
 
 class ChapterCreate(ChapterBase):
-    pass
+    images: List[str] = []  # Sayfa URL'leri veya depolama anahtarları
+
+class ChapterBulkItem(SQLModel):
+    chapter_number: int
+    title: Optional[str] = None  # Verilmezse "Chapter {numara}"
+    release_date: Optional[datetime] = None
+    is_public: bool = True
+    images: List[str] = []
+
+class ChapterBulkResult(SQLModel):
+    created: List[int] = []
+    skipped: List[int] = []  # Zaten var olan bölüm numaraları
 
 class ChapterRead(ChapterBase):
     id: int
@@ -117,11 +232,39 @@ class ChapterRead(ChapterBase):
 class ChapterReadWithImages(SQLModel):
     id: int
     images: List[str]  # Base64 encoded strings or URLs to images,
+    srcset: List[Dict[str, str]] = []  # Sayfa başına format -> "url 720w, url 1280w"
+
 
+class ManifestPage(SQLModel):
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    srcset: Dict[str, str] = {}
+
+class ChapterManifest(SQLModel):
+    """Okuyucunun bir bölümü açarken ihtiyaç duyduğu her şey tek yanıtta."""
+    manga_id: int
+    slug: str
+    manga_title: str
+    chapter_id: int
+    chapter_number: int
+    title: str
+    release_date: Optional[datetime] = None
+    pages: List[ManifestPage] = []
+    prev_chapter: Optional[int] = None  # chapter_number
+    next_chapter: Optional[int] = None
+    next_pages: List[str] = []  # Sonraki bölümün ilk sayfaları (ön yükleme için)
 
 class ChapterUpdatewithImages(SQLModel):
     images: List[str]
 
+class ChapterPageCreate(SQLModel):
+    image: str  # URL veya depolama anahtarı
+    index: Optional[int] = None  # Verilmezse sona eklenir
+
+class ChapterPageMove(SQLModel):
+    to: int
+
 class ChapterReadWithoutImages(SQLModel):
     title: str
     chapter_number: int
@@ -143,6 +286,8 @@ class ChapterReadOneCikaran(SQLModel):
     release_date: Optional[datetime] = None
     is_public: bool
     manga_title: Optional[str] = None
+    manga_slug: Optional[str] = None
+    cover_image: Optional[str] = None
 
 
 class ChapterUpdate(SQLModel):
@@ -153,10 +298,6 @@ class ChapterUpdate(SQLModel):
     is_public: Optional[bool] = None
     images: Optional[List[str]] = None
 
-    def set_images(self, images: List[str]):
-        import json
-        self.images = json.dumps(images)
-
 class CategoryBase(SQLModel):
     name: str
     description: Optional[str] = None
@@ -194,3 +335,49 @@ class CategoryReadWithId(CategoryBase):
     mangas: List[MangaReadCat] = []
 
 
+
+
+class UploadJob(SQLModel, table=True):
+    __tablename__ = "upload_job"
+    __table_args__ = (Index('ix_upload_job_status', 'status', 'id'),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Manga silinince işleri de silinir; arşivler UploadJobWorkers temizliğinde
+    manga_id: int = Field(sa_column=Column(Integer, ForeignKey("manga.id", ondelete="CASCADE"), nullable=False))
+    status: str = "queued"  # queued, running, completed, failed, expired
+    archive_path: str
+    node: Optional[str] = None  # archive_path bu düğümün diskinde
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class UploadJobChapter(SQLModel, table=True):
+    __tablename__ = "upload_job_chapter"
+    job_id: int = Field(sa_column=Column(Integer, ForeignKey("upload_job.id", ondelete="CASCADE"), primary_key=True))
+    chapter_number: int = Field(primary_key=True)
+    total_pages: int = 0
+    stored_pages: int = 0
+    failed_pages: int = 0
+    status: str = "pending"
+    error: Optional[str] = None
+    pages: str = "{}"  # JSON: sayfa sırası -> yüklenen sayfa bilgisi
+
+class UploadJobChapterRead(SQLModel):
+    chapter_number: int
+    total_pages: int
+    stored_pages: int
+    failed_pages: int
+    status: str
+    error: Optional[str] = None
+
+class UploadJobRead(SQLModel):
+    id: int
+    manga_id: int
+    status: str
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    total_pages: int = 0
+    stored_pages: int = 0
+    chapters: List[UploadJobChapterRead] = []
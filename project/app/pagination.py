@@ -0,0 +1,108 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the sort key values of the
+last row of a page. The next page continues with ``WHERE (key, id) > (...)``
+so every page costs an index range scan, however deep the client goes.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, text, tuple_
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_sort_cursor(cursor: str, sort: str) -> List[Any]:
+    """Key values of a cursor that starts with the ``sort`` it was issued for."""
+    values = decode_cursor(cursor)
+    # Başka bir sıralamanın cursor'ı yanlış sütunlarla karşılaştırılırdı
+    if not values or values[0] != sort:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values[1:]
+
+
+def _coerce(column, value):
+    # JSON'da tarih metin olarak taşınır; asyncpg datetime bekler. Sütun
+    # türüne uymayan değer (elle değiştirilmiş cursor) sorguya gitmeden reddedilir
+    try:
+        # SQLModel'in AutoString'i gibi TypeDecorator'lar türü alttakinden alır
+        python_type = getattr(column.type, "impl", column.type).python_type
+    except NotImplementedError:
+        return value
+    if value is None:
+        return value
+    if python_type in (datetime, date):
+        if not isinstance(value, str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        try:
+            return python_type.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if isinstance(value, bool) and python_type is not bool:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def keyset_page(query, columns: Sequence, values: Optional[Sequence[Any]], descending: bool = False):
+    """Order ``query`` by ``columns`` and start it after the row ``values``.
+
+    The last column must be unique (normally the primary key) so the order
+    is total. All columns go in the same direction, which lets Postgres
+    walk a matching composite index and compare with a single row
+    comparison.
+    """
+    if values is not None:
+        if len(values) != len(columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        key, after = tuple_(*columns), tuple_(*(_coerce(c, v) for c, v in zip(columns, values)))
+        query = query.where(key < after if descending else key > after)
+    return query.order_by(*(column.desc() if descending else column for column in columns))
+
+
+async def count_rows(session, model, mode: str = "exact", where: Sequence = ()) -> Optional[int]:
+    """Row count for ``X-Total-Count``.
+
+    ``estimated`` reads the planner statistics from ``pg_class`` instead of
+    scanning the table (only possible without ``where``), ``none`` skips
+    counting altogether.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimated" and not where:
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": model.__tablename__},
+        )
+        estimate = result.scalar()
+        # Hiç ANALYZE edilmemiş tabloda reltuples -1 döner
+        if estimate is not None and estimate >= 0:
+            return estimate
+    result = await session.execute(select(func.count()).select_from(model).where(*where))
+    return result.scalar_one()
@@ -0,0 +1,110 @@
+"""Resized / re-encoded variants ("renditions") of stored page images.
+
+Renditions are configured with ``IMAGE_RENDITIONS`` as comma separated
+``name:width:format:quality`` entries; a width of 0 keeps the original
+size and images are never upscaled. Renditions named in
+``IMAGE_RENDITIONS_EAGER`` are produced by the ingestion worker pool for
+every new page, the others on first request through
+``GET /renditions/{name}/{key}`` (see ``routers/renditions.py``), which
+stores the result next to the original. Only keys of stored pages are
+rendered there, through the same worker pool.
+
+Formats Pillow cannot write in this install (AVIF needs a recent Pillow
+built with libavif) are dropped with a warning.
+"""
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENDITIONS = "thumb:240:webp:70,mobile:720:webp:75,desktop:1280:webp:80,mobile-avif:720:avif:55,desktop-avif:1280:avif:60"
+RENDITION_BASE_URL = os.getenv("RENDITION_BASE_URL", "/renditions").rstrip("/")
+
+_PIL_FORMATS = {"webp": "WEBP", "avif": "AVIF", "jpeg": "JPEG"}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    width: int
+    format: str  # webp, avif, jpeg
+    quality: int
+
+    @property
+    def content_type(self) -> str:
+        return f"image/{self.format}"
+
+
+def format_supported(fmt: str) -> bool:
+    if fmt not in _PIL_FORMATS:
+        return False
+    return fmt == "jpeg" or bool(features.check(fmt))
+
+
+def parse_renditions(spec: str) -> Dict[str, Rendition]:
+    renditions: Dict[str, Rendition] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, width, fmt, quality = item.split(":")
+            rendition = Rendition(name=name, width=int(width), format=fmt.lower(), quality=int(quality))
+        except ValueError:
+            raise ValueError(f"Invalid rendition {item!r}, expected name:width:format:quality")
+        if not format_supported(rendition.format):
+            logger.warning("Skipping rendition %s: Pillow cannot write %s here", name, rendition.format)
+            continue
+        renditions[name] = rendition
+    return renditions
+
+
+RENDITIONS = parse_renditions(os.getenv("IMAGE_RENDITIONS", DEFAULT_RENDITIONS))
+EAGER_RENDITIONS = tuple(
+    RENDITIONS[name]
+    for name in filter(None, (part.strip() for part in os.getenv("IMAGE_RENDITIONS_EAGER", "thumb").split(",")))
+    if name in RENDITIONS
+)
+
+
+def rendition_key(key: str, rendition: Rendition) -> str:
+    return f"renditions/{rendition.name}/{os.path.splitext(key)[0]}.{rendition.format}"
+
+
+def render_image(image: Image.Image, rendition: Rendition) -> bytes:
+    """Encode ``image`` for ``rendition``. Safe to run in a worker process."""
+    if rendition.width and image.width > rendition.width:
+        height = max(1, round(image.height * rendition.width / image.width))
+        image = image.resize((rendition.width, height), Image.LANCZOS)
+    if rendition.format == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, _PIL_FORMATS[rendition.format], quality=rendition.quality)
+    return out.getvalue()
+
+
+def render(data: bytes, rendition: Rendition) -> bytes:
+    """Decode a stored page and encode it for ``rendition``. Runs in a worker process."""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return render_image(image, rendition)
+
+
+def rendition_url(key: str, rendition: Rendition) -> str:
+    return f"{RENDITION_BASE_URL}/{rendition.name}/{key}"
+
+
+def srcset(key: str) -> Dict[str, str]:
+    """``srcset`` strings of a page, one per format (for ``<picture><source type=...>``)."""
+    if key.startswith(("http://", "https://", "/")):
+        return {}  # Dış URL'ler bizim depoda değil
+    by_format: Dict[str, List[Rendition]] = {}
+    for rendition in RENDITIONS.values():
+        if rendition.width:
+            by_format.setdefault(rendition.format, []).append(rendition)
+    return {
+        fmt: ", ".join(f"{rendition_url(key, r)} {r.width}w" for r in sorted(items, key=lambda r: r.width))
+        for fmt, items in by_format.items()
+    }
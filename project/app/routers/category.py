@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlmodel import Session, select
-from typing import List
-from ..database import get_session
-from ..models import Category, CategoryCreate, CategoryRead, CategoryUpdate,MangaReadCat,CategoryReadWithId
+from typing import List, Optional
+from ..database import get_session, with_session
+from ..cache import response_cache
+from ..category_index import category_index
+from ..counters import read_counts
+from ..fast_json import json_response, model_columns, row_dicts
+from ..models import Manga, MangaCategoryLink, Category, CategoryCreate, CategoryRead, CategoryUpdate,MangaReadCat,CategoryReadWithId
+from sqlalchemy import update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,39 +19,87 @@ async def create_category(category: CategoryCreate, session: Session = Depends(g
     session.add(db_category)
     await session.commit()
     await session.refresh(db_category)
+    response_cache.invalidate("categories")
     return db_category
 
 
 @router.get("/category/", response_model=List[CategoryRead])
-async def read_categories(session: AsyncSession = Depends(get_session)):
+async def read_categories():
+    return await response_cache.get_or_load(("categories",), lambda: with_session(_load_categories), ["categories"])
+
+async def _load_categories(session) -> list:
     result = await session.execute(select(Category))
     categories = result.scalars().all()
-    return categories
+    return [CategoryRead.model_validate(category).model_dump(mode="json") for category in categories]
+
+async def _manga_page(session, ids: List[int]) -> List[dict]:
+    if not ids:
+        return []
+    fields = model_columns(Manga, MangaReadCat, exclude=("categories",))
+    result = await session.execute(select(*fields).where(Manga.id.in_(ids)))
+    by_id = {manga["id"]: manga for manga in row_dicts(result)}
+    mangas = [by_id[manga_id] for manga_id in ids if manga_id in by_id]
+    for manga in mangas:
+        manga["read_count"] = (manga["read_count"] or 0) + read_counts.pending(manga["id"])
+        manga["categories"] = []
+    return mangas
+
+# /category/{category_id} rotasından önce tanımlanmalı
+@router.get("/category/browse", response_model=List[MangaReadCat])
+async def browse_categories(
+    response: Response,
+    all_of: List[int] = Query([], alias="all", description="Bu kategorilerin hepsinde olanlar"),
+    any_of: List[int] = Query([], alias="any", description="Bu kategorilerden en az birinde olanlar"),
+    none_of: List[int] = Query([], alias="none", description="Bu kategorilerin hiçbirinde olmayanlar"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    session: AsyncSession = Depends(get_session)
+):
+    # Örn. aksiyon VE romantik DEĞİL korku: ?all=1&all=2&none=3
+    await category_index.ensure_fresh(session)
+    total, ids = category_index.page(category_index.query(all_of, any_of, none_of), offset, limit, order == "desc")
+    response.headers['X-Total-Count'] = str(total)
+    return json_response(await _manga_page(session, ids), response)
 
 @router.get("/category/{category_id}", response_model=CategoryReadWithId)
-async def read_category(category_id: int, session: AsyncSession = Depends(get_session)):
-    query = select(Category).where(Category.id == category_id).options(selectinload(Category.mangas))
-    result = await session.execute(query)
-    category = result.scalar_one_or_none()
+async def read_category(
+    category_id: int,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    session: AsyncSession = Depends(get_session)
+):
+    category = await session.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Create the response model
-    category_read = CategoryReadWithId(
-        id=category.id,
-        name=category.name,
-        description=category.description,
-        mangas=[MangaReadCat(
-            id=manga.id,
-            title=manga.title,
-            author=manga.author,
-            description=manga.description,
-            cover_image=manga.cover_image,
-            read_count=manga.read_count,
-        ) for manga in category.mangas]
+
+    # Üye mangalar bellekteki indeksten sayfalanır, bağlantı tablosu join edilmez
+    await category_index.ensure_fresh(session)
+    total, ids = category_index.page(category_index.query(all_of=[category_id]), offset, limit)
+    response.headers['X-Total-Count'] = str(total)
+
+    return json_response({
+        "name": category.name,
+        "description": category.description,
+        "id": category.id,
+        "mangas": await _manga_page(session, ids),
+    }, response)
+
+async def _touch_category_mangas(session, category_id: int) -> List[int]:
+    # Kategori adı MangaRead içinde; bağlı mangaların ETag/Last-Modified'ı ilerlemeli
+    result = await session.execute(
+        update(Manga)
+        .where(Manga.id.in_(select(MangaCategoryLink.manga_id).where(MangaCategoryLink.category_id == category_id)))
+        .values(version=Manga.version + 1)
+        .returning(Manga.id)
     )
-    
-    return category_read
+    return list(result.scalars())
+
+def _invalidate_category(manga_ids: List[int]):
+    # chapters:{id} girdileri manga sürümünü taşır (ETag)
+    tags = [tag for manga_id in manga_ids for tag in (f"manga:{manga_id}", f"chapters:{manga_id}")]
+    response_cache.invalidate("categories", *tags)
 
 @router.put("/category/{category_id}", response_model=CategoryUpdate)
 async def update_category(category_id: int, category: CategoryUpdate, session: Session = Depends(get_session)):
@@ -57,8 +110,10 @@ async def update_category(category_id: int, category: CategoryUpdate, session: S
     for key, value in category_data.items():
         setattr(db_category, key, value)
     session.add(db_category)
+    manga_ids = await _touch_category_mangas(session, category_id)
     await session.commit()
     await session.refresh(db_category)
+    _invalidate_category(manga_ids)
     return db_category
 
 @router.delete("/category/{category_id}")
@@ -66,6 +121,9 @@ async def delete_category(category_id: int, session: Session = Depends(get_sessi
     db_category = await session.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
+    manga_ids = await _touch_category_mangas(session, category_id)
     await session.delete(db_category)
     await session.commit()
+    _invalidate_category(manga_ids)
+    category_index.remove_category(category_id)
     return {"ok": True}
\ No newline at end of file
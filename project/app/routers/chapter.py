@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlmodel import Session, select
-from typing import List
-from ..database import get_session
-from ..models import Chapter, ChapterCreate, ChapterRead, ChapterUpdate,ChapterReadOneCikaran
-from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from ..database import get_session, with_session
+from ..models import Chapter, ChapterBulkItem, ChapterBulkResult, ChapterCreate, ChapterRead, ChapterUpdate,ChapterReadOneCikaran,LatestUpdate,Manga,MangaCategoryLink
+from ..cache import response_cache
+from ..chapter_pages import bulk_insert_chapters, read_page_urls, replace_pages, touch_manga
+from ..storage import get_storage
+from ..pagination import decode_cursor, encode_cursor, keyset_page
+from ..fast_json import json_response, model_columns, row_dicts
 
 router = APIRouter()
 
@@ -12,15 +16,37 @@ async def create_chapter_for_manga(manga_id: int, chapter: ChapterCreate, sessio
     db_chapter = Chapter.from_orm(chapter)
     db_chapter.manga_id = manga_id
     session.add(db_chapter)
+    await session.flush()
+    await replace_pages(session, db_chapter.id, chapter.images)
+    await touch_manga(session, manga_id)
     await session.commit()
     await session.refresh(db_chapter)
+    response_cache.invalidate(f"chapters:{manga_id}", "latest-chapters")
     return db_chapter
 
+@router.post("/manga/{manga_id}/chapters/bulk", response_model=ChapterBulkResult)
+async def bulk_create_chapters(manga_id: int, chapters: List[ChapterBulkItem], session: Session = Depends(get_session)):
+    # Tüm bölümler ve sayfaları tek transaction'da; var olan numaralar atlanır
+    if not await session.get(Manga, manga_id):
+        raise HTTPException(status_code=404, detail="Manga not found")
+    storage = get_storage()
+    created, skipped = await bulk_insert_chapters(session, manga_id, [
+        dict(
+            chapter.model_dump(exclude={"images"}),
+            pages=[dict(storage_key=storage.key_for(image)) for image in chapter.images],
+        )
+        for chapter in chapters
+    ])
+    await session.commit()
+    if created:
+        response_cache.invalidate(f"chapters:{manga_id}", "latest-chapters")
+    return ChapterBulkResult(created=created, skipped=skipped)
+
 @router.get("/manga/{manga_id}/chaptersall", response_model=List[ChapterRead])
 async def read_chapters_for_manga(manga_id: int, session: Session = Depends(get_session)):
-    result = await session.exec(select(Chapter).where(Chapter.manga_id == manga_id))
-    chapters = result.all()
-    return chapters
+    # Yüzlerce bölümlük seriler için ORM nesnesi kurmadan sütunlar okunur
+    result = await session.execute(select(*model_columns(Chapter, ChapterRead)).where(Chapter.manga_id == manga_id))
+    return json_response(row_dicts(result))
 
 @router.put("/chapter/{chapter_id}", response_model=ChapterRead)
 async def update_chapter(chapter_id: int, chapter: ChapterUpdate, session: Session = Depends(get_session)):
@@ -28,52 +54,84 @@ async def update_chapter(chapter_id: int, chapter: ChapterUpdate, session: Sessi
     if not db_chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
     chapter_data = chapter.dict(exclude_unset=True)
+    images = chapter_data.pop("images", None)
+    old_manga_id = db_chapter.manga_id
     for key, value in chapter_data.items():
         setattr(db_chapter, key, value)
     session.add(db_chapter)
+    if images is not None:
+        await replace_pages(session, chapter_id, images)
+    await touch_manga(session, old_manga_id)
+    if db_chapter.manga_id != old_manga_id:
+        await touch_manga(session, db_chapter.manga_id)
     await session.commit()
     await session.refresh(db_chapter)
+    response_cache.invalidate(f"chapters:{old_manga_id}", f"chapters:{db_chapter.manga_id}", "latest-chapters")
     return db_chapter
 
 
 @router.delete("/chapter/{chapter_id}")
 async def delete_chapter(chapter_id: int, session: Session = Depends(get_session)):
     db_chapter = await session.get(Chapter, chapter_id)
-    chaptered = db_chapter.scalar_one_or_none()
     if not db_chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
-    await session.delete(chaptered)
+    await session.delete(db_chapter)
+    await touch_manga(session, db_chapter.manga_id)
     await session.commit()
+    response_cache.invalidate(f"chapters:{db_chapter.manga_id}", "latest-chapters")
     return {"ok": True}
 
 @router.get("/chapters/{chapter_id}/images", response_model=List[str])
-async def get_chapter_images(chapter_id: int, session: Session = Depends(get_session)):
-    chapter = await session.get(Chapter, chapter_id)
-    if not chapter:
+async def get_chapter_images(chapter_id: int, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1), session: Session = Depends(get_session)):
+    images = await read_page_urls(session, Chapter.id == chapter_id, offset=offset, limit=limit)
+    if images is None:
         raise HTTPException(status_code=404, detail="Chapter not found")
-    return chapter.get_images()
+    return images
 
 @router.get("/latest-chapters/", response_model=List[ChapterReadOneCikaran])
-async def get_latest_chapters(limit: int = 6, session: Session = Depends(get_session)):
-    result = await session.execute(
-        select(Chapter)
-        .options(joinedload(Chapter.manga))
-        .order_by(Chapter.release_date.desc())
-        .limit(limit)
+async def get_latest_chapters(
+    response: Response,
+    limit: int = Query(6, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    category: Optional[int] = Query(None),
+):
+    page = await response_cache.get_or_load(
+        ("latest-chapters", limit, cursor, category),
+        lambda: with_session(_load_latest_chapters, limit, cursor, category),
+        ["latest-chapters"],
     )
-    latest_chapters = result.scalars().all()
+    if page["next_cursor"] is not None:
+        response.headers['X-Next-Cursor'] = page["next_cursor"]
+    return page["items"]
+
+def latest_updates_query(limit: int, after: Optional[list] = None, category: Optional[int] = None):
+    # latest_update manga başına tek satır tutar; sıralama indeksten okunur
+    columns = (LatestUpdate.release_date, LatestUpdate.manga_id)
+    query = select(LatestUpdate)
+    if category is not None:
+        query = query.where(LatestUpdate.manga_id.in_(
+            select(MangaCategoryLink.manga_id).where(MangaCategoryLink.category_id == category)
+        ))
+    return keyset_page(query, columns, after, descending=True).limit(limit)
 
-    # ChapterReadWithoutImages modeline manga başlıklarını ekleyelim
-    latest_chapters_with_titles = [
+async def _load_latest_chapters(session, limit: int, cursor: Optional[str], category: Optional[int]) -> dict:
+    result = await session.execute(latest_updates_query(limit, decode_cursor(cursor) if cursor else None, category))
+    updates = result.scalars().all()
+
+    items = [
         ChapterReadOneCikaran(
-            title=chapter.title,
-            chapter_number=chapter.chapter_number,
-            manga_id=chapter.manga_id,
-            release_date=chapter.release_date,
-            is_public=chapter.is_public,
-            manga_title=chapter.manga.title if chapter.manga else None
-        )
-        for chapter in latest_chapters
+            title=update.title,
+            chapter_number=update.chapter_number,
+            manga_id=update.manga_id,
+            release_date=update.release_date,
+            is_public=update.is_public,
+            manga_title=update.manga_title,
+            manga_slug=update.manga_slug,
+            cover_image=update.cover_image,
+        ).model_dump(mode="json")
+        for update in updates
     ]
-
-    return latest_chapters_with_titles
\ No newline at end of file
+    next_cursor = None
+    if len(updates) == limit:
+        next_cursor = encode_cursor([updates[-1].release_date, updates[-1].manga_id])
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlmodel import Session, select
+from ..database import get_session
+from ..jobs import upload_jobs
+from ..models import UploadJob, UploadJobChapter, UploadJobChapterRead, UploadJobRead
+
+router = APIRouter()
+
+
+async def _job_read(job: UploadJob, session) -> UploadJobRead:
+    result = await session.exec(
+        select(UploadJobChapter)
+        .where(UploadJobChapter.job_id == job.id)
+        .order_by(UploadJobChapter.chapter_number)
+    )
+    chapters = [UploadJobChapterRead.from_orm(chapter) for chapter in result.all()]
+    return UploadJobRead(
+        id=job.id,
+        manga_id=job.manga_id,
+        status=job.status,
+        error=job.error,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        total_pages=sum(chapter.total_pages for chapter in chapters),
+        stored_pages=sum(chapter.stored_pages for chapter in chapters),
+        chapters=chapters,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=UploadJobRead)
+async def read_job(job_id: int, session: Session = Depends(get_session)):
+    job = await session.get(UploadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await _job_read(job, session)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=UploadJobRead)
+async def resume_job(job_id: int, session: Session = Depends(get_session)):
+    job = await session.get(UploadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=400, detail=f"Job is {job.status}")
+    job.status = "queued"
+    job.error = None
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    upload_jobs.notify()
+    return await _job_read(job, session)
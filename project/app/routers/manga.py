@@ -1,25 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File,Query, Response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File,Query, Request, Response
 from sqlmodel import Session,  select,func,delete
 from sqlalchemy.future import select
 from typing import List
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, or_, true
+from sqlalchemy.orm import aliased, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..database import get_session
-from typing import List, Optional
-from ..models import Manga, MangaCreate, MangaRead, MangaUpdate, MangaCategoryLink,Chapter,ChapterRead,ChapterUpdate,ChapterReadWithImages,ChapterReadWithoutImages,ChapterUpdatewithImages,ChapterReadWithoutImagesStr
+from ..database import get_session, with_session
+from typing import Dict, List, Optional, Sequence, Union
+from ..models import Category, CategoryRead, Manga, MangaCreate, MangaRead, MangaUpdate, MangaCategoryLink,MangaFacet,MangaPage,MANGA_LATEST_SORT,MANGA_RATING_SORT,MANGA_YEAR_SORT,Chapter,ChapterRead,ChapterUpdate,ChapterReadWithImages,ChapterReadWithoutImages,ChapterUpdatewithImages,ChapterReadWithoutImagesStr,UploadJob,ChapterPageCreate,ChapterPageMove,ChapterPage,ChapterManifest
+from ..chapter_pages import read_page_keys, replace_pages, insert_page, delete_page, move_page, touch_manga
+from ..http_cache import cache_headers, conditional_response, has_validators, is_not_modified, make_etag
+from ..cache import response_cache
+from ..category_index import category_index
+from ..counters import read_counts
+from ..search import search_mangas
+from ..renditions import srcset
+from ..storage import get_storage
+from ..pagination import count_rows, decode_sort_cursor, encode_cursor, keyset_page
+from ..fast_json import json_response, model_columns, row_dicts
 import zipfile
-import io
-import base64
-import json
-import re
-from fastapi.responses import JSONResponse
-from PIL import Image
-import paramiko
 import os
-from natsort import natsorted
-
-
-from ftplib import FTP
+from fastapi.responses import JSONResponse
+from ..ingest import spool_upload
+from ..jobs import JOB_NODE, JOB_SPOOL_DIR, on_this_node, remove_archive, upload_jobs
 
 router = APIRouter()
 
@@ -38,6 +41,7 @@ async def create_manga(manga: MangaCreate, session: Session = Depends(get_sessio
     
     await session.commit()
     await session.refresh(db_manga)
+    category_index.set_manga(db_manga.id, manga.category_ids)
 
     query = select(Manga).where(Manga.id == db_manga.id).options(selectinload(Manga.categories))
     result = await session.execute(query)
@@ -48,52 +52,185 @@ async def create_manga(manga: MangaCreate, session: Session = Depends(get_sessio
     return manga_with_categories
 
 
-@router.get("/manga/", response_model=List[MangaRead])
+# sort parametresi -> (sıralama sütunları, azalan mı)
+MANGA_SORTS = {
+    "id": ((Manga.id,), False),
+    "title": ((Manga.title, Manga.id), False),
+    "popular": ((Manga.read_count, Manga.id), True),
+    "read_count": ((Manga.read_count, Manga.id), True),
+    "rating": ((MANGA_RATING_SORT, Manga.id), True),
+    "year": ((MANGA_YEAR_SORT, Manga.id), True),
+    "latest": ((MANGA_LATEST_SORT, Manga.id), True),
+}
+
+async def read_facets(session) -> Dict[str, Dict[str, int]]:
+    result = await session.execute(select(MangaFacet.dimension, MangaFacet.value, MangaFacet.count).where(MangaFacet.count > 0))
+    facets: Dict[str, Dict[str, int]] = {}
+    for dimension, value, count in result.all():
+        facets.setdefault(dimension, {})[value] = count
+    return facets
+
+def manga_filters(
+    language: Optional[List[str]] = None,
+    genre: Optional[List[str]] = None,
+    status: Optional[List[str]] = None,
+    publisher: Optional[List[str]] = None,
+    year: Optional[List[int]] = None,
+    category: Optional[List[int]] = None,
+    min_rating: Optional[float] = None,
+) -> list:
+    # Aynı boyuttaki değerler VEYA, farklı boyutlar VE ile birleşir
+    filters = []
+    for column, values in ((Manga.language, language), (Manga.genre, genre), (Manga.status, status),
+                           (Manga.publisher, publisher), (Manga.year, year)):
+        if values:
+            filters.append(column.in_(values))
+    if category:
+        filters.append(Manga.id.in_(
+            select(MangaCategoryLink.manga_id).where(MangaCategoryLink.category_id.in_(category))
+        ))
+    if min_rating is not None:
+        filters.append(Manga.rating >= min_rating)
+    return filters
+
+def manga_list_query(fields, sort: str, after: Optional[list] = None, filters: Sequence = ()):
+    """``GET /manga/`` page query; the sort key values are selected after ``fields``."""
+    columns, descending = MANGA_SORTS[sort]
+    query = select(*fields, *columns).where(*filters)
+    return keyset_page(query, columns, after, descending)
+
+@router.get("/manga/", response_model=Union[List[MangaRead], MangaPage])
 async def read_mangas(
     response: Response,
     skip: Optional[int] = Query(None),
     limit: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None),
+    sort: str = Query("id", pattern="^(id|title|popular|read_count|rating|year|latest)$"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
+    language: Optional[List[str]] = Query(None),
+    genre: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    publisher: Optional[List[str]] = Query(None),
+    year: Optional[List[int]] = Query(None),
+    category: Optional[List[int]] = Query(None),
+    min_rating: Optional[float] = Query(None),
+    facets: bool = Query(False),
     session: Session = Depends(get_session)
 ):
-    total_result = await session.execute(select(Manga))
-    total = len(total_result.scalars().all())
-
-    query = select(Manga).options(selectinload(Manga.categories))
-    
+    filters = manga_filters(language, genre, status, publisher, year, category, min_rating)
+    columns, _ = MANGA_SORTS[sort]
+    after = None
+    if cursor is not None:
+        after = decode_sort_cursor(cursor, sort)
+
+    # Sıralama değerleri cursor için satırla birlikte seçilir. Büyük listelerde
+    # ORM nesnesi yerine sütun demetleri okunur ve orjson ile yazılır
+    fields = model_columns(Manga, MangaRead, exclude=("categories",))
+    query = manga_list_query(fields, sort, after, filters)
     if skip is not None:
         query = query.offset(skip)
     if limit is not None:
         query = query.limit(limit)
         
     result = await session.execute(query)
-    mangas = result.scalars().all()
+    rows = result.all()
+    mangas = row_dicts((row[:len(fields)] for row in rows), [field.name for field in fields])
+    categories = await read_manga_categories(session, [manga["id"] for manga in mangas])
+    for manga in mangas:
+        manga["read_count"] = (manga["read_count"] or 0) + read_counts.pending(manga["id"])
+        manga["categories"] = categories.get(manga["id"], [])
 
     # X-Total-Count başlığını yanıtın başlıklarına ekle
-    response.headers['X-Total-Count'] = str(total)
-    
+    total = await count_rows(session, Manga, count, filters)
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = encode_cursor([sort] + list(rows[-1][len(fields):]))
+        response.headers['X-Next-Cursor'] = next_cursor
+
+    if facets:
+        page = {"items": mangas, "total": total, "next_cursor": next_cursor, "facets": await read_facets(session)}
+        return json_response(page, response)
+    return json_response(mangas, response)
+
+async def read_manga_categories(session, manga_ids: List[int]) -> Dict[int, List[dict]]:
+    """CategoryRead dicts of each manga, in one query."""
+    if not manga_ids:
+        return {}
+    result = await session.execute(
+        select(MangaCategoryLink.manga_id, *model_columns(Category, CategoryRead))
+        .join(Category, Category.id == MangaCategoryLink.category_id)
+        .where(MangaCategoryLink.manga_id.in_(manga_ids))
+        .order_by(MangaCategoryLink.manga_id, Category.id)
+    )
+    categories: Dict[int, List[dict]] = {}
+    for manga_id, *values in result.all():
+        categories.setdefault(manga_id, []).append(dict(zip(CategoryRead.model_fields, values)))
+    return categories
+
+# /manga/{manga_id} rotasından önce tanımlanmalı
+@router.get("/manga/search", response_model=List[MangaRead])
+async def search_manga(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session)
+):
+    mangas = await search_mangas(session, q, limit=limit, offset=offset)
+    read_counts.merge(mangas)
     return mangas
 
-@router.get("/manga/{manga_id}", response_model=MangaRead)
-async def read_manga(manga_id: int, session: Session = Depends(get_session)):
-    query = select(Manga).where(Manga.id == manga_id).options(selectinload(Manga.categories))
+async def _load_manga(session, *where) -> dict:
+    query = select(Manga).where(*where).options(selectinload(Manga.categories))
     result = await session.execute(query)
     manga = result.scalar_one_or_none()
-    manga.read_count += 1
-    session.add(manga)
-    await session.commit()
-
     if not manga:
         raise HTTPException(status_code=404, detail="Manga not found")
-    return manga
+    data = MangaRead.model_validate(manga).model_dump(mode="json")
+    # ETag için; yanıt modelinde olmadığından istemciye gitmez
+    data.update(version=manga.version, updated_at=manga.updated_at)
+    return data
+
+def _manga_tags(manga: dict) -> List[str]:
+    return [f"manga:{manga['id']}", "categories"]
+
+def _with_read_count(manga: dict) -> dict:
+    # Önbellekteki değer son flush'a kadarki sayıdır, bekleyen görüntülemeler eklenir
+    return {**manga, "read_count": manga["read_count"] + read_counts.pending(manga["id"])}
+
+@router.get("/manga/{manga_id}", response_model=MangaRead)
+async def read_manga(manga_id: int):
+    manga = await response_cache.get_or_load(
+        ("manga", manga_id), lambda: with_session(_load_manga, Manga.id == manga_id), _manga_tags
+    )
+
+    # Sayaç bellekte tutulur ve toplu yazılır, okuma satırı kilitlemez
+    read_counts.hit(manga_id)
+    return _with_read_count(manga)
+
+def _manga_etag(manga_id: int, version: int) -> str:
+    # read_count doğrulayıcıya girmez (Last-Modified gibi yalnızca sürüm), bu yüzden zayıf ETag
+    return make_etag("manga", manga_id, version, weak=True)
 
 @router.get("/mangasl/{manga_slug}", response_model=MangaRead)
-async def read_manga(manga_slug: str, session: Session = Depends(get_session)):
-    query = select(Manga).where(Manga.slug == manga_slug).options(selectinload(Manga.categories))
-    result = await session.execute(query)
-    manga = result.scalar_one_or_none()
-    if not manga:
-        raise HTTPException(status_code=404, detail="Manga not found")
-    return manga
+async def read_manga(manga_slug: str, request: Request, response: Response, session: Session = Depends(get_session)):
+    if has_validators(request):
+        # 304 kararı tek satırlık sürüm sorgusuyla verilir, yanıt oluşturulmaz
+        result = await session.execute(
+            select(Manga.id, Manga.version, Manga.updated_at).where(Manga.slug == manga_slug)
+        )
+        row = result.first()
+        if row is not None:
+            not_modified = conditional_response(request, response, _manga_etag(row.id, row.version), row.updated_at)
+            if not_modified is not None:
+                return not_modified
+
+    manga = await response_cache.get_or_load(
+        ("mangasl", manga_slug), lambda: with_session(_load_manga, Manga.slug == manga_slug), _manga_tags
+    )
+    conditional_response(request, response, _manga_etag(manga["id"], manga["version"]), manga["updated_at"])
+    return _with_read_count(manga)
 
 
 @router.put("/manga/{manga_id}")
@@ -110,6 +247,8 @@ async def update_mangaa(manga_id: int, update_request: MangaUpdate, session: Ses
         for category_id in update_request.category_ids:
             link = MangaCategoryLink(manga_id=db_manga.id, category_id=category_id)
             session.add(link)
+        # Yalnızca kategoriler değişse de MangaRead değişir; ETag/Last-Modified ilerlemeli
+        await touch_manga(session, manga_id)
 
 
     db_manga.title = update_request.title
@@ -129,6 +268,9 @@ async def update_mangaa(manga_id: int, update_request: MangaUpdate, session: Ses
     session.add(db_manga)
     await session.commit()
     await session.refresh(db_manga)
+    response_cache.invalidate(f"manga:{manga_id}", f"chapters:{manga_id}", "latest-chapters")
+    if update_request.category_ids is not None:
+        category_index.set_manga(manga_id, update_request.category_ids)
 
     return {"message": "Mangas updated successfully"}
 
@@ -171,183 +313,257 @@ async def delete_manga(manga_id: int, session: Session = Depends(get_session)):
         for chapter in chapters.scalars().all():
             await session.delete(chapter)
         
+        # Yükleme işleri FK ile silinir; bu düğümdeki arşivleri hemen temizle
+        # (diğer düğümlerinkileri kendi temizlikleri siler)
+        archives = (await session.execute(
+            select(UploadJob.archive_path).where(UploadJob.manga_id == manga_id, on_this_node())
+        )).scalars().all()
+
         # Sonra Manga kaydını silin
         await session.delete(db_manga)
     
     await session.commit()
+    for path in archives:
+        remove_archive(path)
+    response_cache.invalidate(f"manga:{manga_id}", f"chapters:{manga_id}", "latest-chapters")
+    category_index.remove_manga(manga_id)
     return {"ok": True}
 
 
-def upload_to_sftp(local_path, remote_path, sftp):
-    try:
-        sftp.put(local_path, remote_path)
-    except Exception as e:
-        print(f"Could not upload {local_path} to {remote_path}: {e}")
-        raise
-
-def sftp_mkdir_recursive(sftp, path):
-    dirs = path.split("/")
-    current_path = ""
-    for dir in dirs:
-        if dir:  # Boş stringleri atla
-            current_path = current_path + "/" + dir
-            try:
-                sftp.mkdir(current_path)
-            except IOError:
-                pass  # Dizin zaten mevcut olabilir
-
-@router.post("/manga/{manga_id}/upload_chapters")
+@router.post("/manga/{manga_id}/upload_chapters", status_code=202)
 async def upload_chapters(manga_id: int, zip_file: UploadFile = File(...), session: Session = Depends(get_session)):
     manga = await session.get(Manga, manga_id)
     if not manga:
         raise HTTPException(status_code=404, detail="Manga not found")
-    
-    # ZIP dosyasını oku ve ayıkla
-    zip_bytes = await zip_file.read()
-    zip_data = io.BytesIO(zip_bytes)
-    with zipfile.ZipFile(zip_data, 'r') as zip_ref:
-        chapter_folders = natsorted([f for f in zip_ref.namelist() if f.endswith('/')])
-
-        # SFTP bağlantısını kur
-        host = "209.38.238.11"  # SFTP sunucusunun IP adresi veya alan adı
-        port = 2222
-        username = "ftpuser"
-        password = "memlekeT12"
-        
-        transport = paramiko.Transport((host, port))
-        transport.connect(username=username, password=password)
-        sftp = paramiko.SFTPClient.from_transport(transport)
-        
-        for chapter_folder in chapter_folders:
-            match = re.search(r'\d+', chapter_folder)
-            if not match:
-                continue
-            chapter_number = int(match.group())
-
-            # Bölümün veritabanında mevcut olup olmadığını kontrol et
-            existing_chapter = await session.execute(
-                select(Chapter).filter_by(manga_id=manga_id, chapter_number=chapter_number)
-            )
-            if existing_chapter.scalars().first():
-                print(f"Chapter {chapter_number} already exists in the database.")
-                continue  # Bölüm veritabanında mevcutsa atla
-
-            db_chapter = Chapter(title=f"Chapter {chapter_number}", chapter_number=chapter_number, manga_id=manga_id)
-            session.add(db_chapter)
-            await session.commit()
-            await session.refresh(db_chapter)
-
-            images = []
-            image_files = natsorted(
-                [f for f in zip_ref.namelist() if f.startswith(chapter_folder) and not f.endswith('/')],
-                key=lambda x: x.lower()
-            )
-            
-            chapter_dir = f"/upload/manga_{manga_id}/chapter_{chapter_number}"
-            sftp_mkdir_recursive(sftp, chapter_dir)  # Dizinleri tek tek oluştur
-            
-            for file_name in image_files:
-                print(file_name)
-                image_data = zip_ref.read(file_name)
-                image = Image.open(io.BytesIO(image_data))
-                local_webp_image_path = f"/tmp/{os.path.splitext(os.path.basename(file_name))[0]}.webp"
-                image.save(local_webp_image_path, "WEBP", quality=80)  # WebP formatında kaydet
-                
-                remote_webp_image_path = f"{chapter_dir}/{os.path.splitext(os.path.basename(file_name))[0]}.webp"
-                try:
-                    upload_to_sftp(local_webp_image_path, remote_webp_image_path, sftp)
-                    image_url = f"http://209.38.238.11/cdn/manga_{manga_id}/chapter_{chapter_number}/{os.path.splitext(os.path.basename(file_name))[0]}.webp"
-                    images.append(image_url)
-                except Exception as e:
-                    print(f"Could not upload {local_webp_image_path} to {remote_webp_image_path}: {e}")
-                finally:
-                    os.remove(local_webp_image_path)  # Yerel dosyayı kaldır
-                    
-            db_chapter.set_images(images)  # Resim yollarını JSON formatında kaydet
-            session.add(db_chapter)
-            await session.commit()
-
-        sftp.close()
-        transport.close()
-
-    return {"message": "Chapters uploaded successfully"}
+
+    # ZIP dosyasını diske yaz, bölümler arka planda işlenir
+    zip_path = await spool_upload(zip_file, JOB_SPOOL_DIR)
+    if not zipfile.is_zipfile(zip_path):
+        os.remove(zip_path)
+        raise HTTPException(status_code=400, detail="Invalid ZIP file")
+
+    job = UploadJob(manga_id=manga_id, archive_path=zip_path, node=JOB_NODE)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    upload_jobs.notify()
+
+    return {"job_id": job.id, "status": job.status}
 
 
 
 @router.get("/manga/{manga_id}/chapters", response_model=List[ChapterReadWithoutImages])
 async def get_chapters(manga_id: int, session: Session = Depends(get_session)):
-    result = await session.execute(select(Chapter).where(Chapter.manga_id == manga_id))
-    chapters = result.scalars().all()
-    return chapters
+    result = await session.execute(manga_chapters_query(manga_id))
+    return json_response(row_dicts(result))
+
+def manga_chapters_query(manga_id: int):
+    # Yalnızca yanıt modelinin sütunları okunur
+    return select(*model_columns(Chapter, ChapterReadWithoutImages)).where(Chapter.manga_id == manga_id)
+
+SLUG_CHAPTER_FIELDS = model_columns(Chapter, ChapterReadWithoutImagesStr, exclude=("slug",))
+
+def slug_chapters_query(slug: str):
+    # Slug çözümü ve bölüm listesi tek sorguda; bölümü olmayan manga tek NULL satır döner
+    return (
+        select(Manga.id, Manga.version, Manga.updated_at, Chapter.id.label("chapter_id"), *SLUG_CHAPTER_FIELDS)
+        .select_from(Manga)
+        .outerjoin(Chapter, Chapter.manga_id == Manga.id)
+        .where(Manga.slug == slug)
+    )
+
+async def _load_slug_chapters(session, slug: str) -> dict:
+    fields = SLUG_CHAPTER_FIELDS
+    result = await session.execute(slug_chapters_query(slug))
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Manga not found")
+    manga = rows[0]
+    chapters = [
+        ChapterReadWithoutImagesStr(slug=slug, **{field.name: value for field, value in zip(fields, row[4:])}).model_dump(mode="json")
+        for row in rows if row.chapter_id is not None
+    ]
+    return {"manga_id": manga.id, "version": manga.version, "updated_at": manga.updated_at, "chapters": chapters}
 
 @router.get("/mangasl/{slug}/chapters", response_model=List[ChapterReadWithoutImagesStr])
-async def get_chapters(slug: str, session: Session = Depends(get_session)):
+async def get_chapters(slug: str, request: Request, response: Response, session: Session = Depends(get_session)):
+    # Bölüm listesi değişince manganın sürümü de artar (touch_manga)
+    if has_validators(request):
+        result = await session.execute(select(Manga.id, Manga.version, Manga.updated_at).where(Manga.slug == slug))
+        row = result.first()
+        if row is not None:
+            not_modified = conditional_response(request, response, make_etag("chapters", row.id, row.version), row.updated_at)
+            if not_modified is not None:
+                return not_modified
+
+    cached = await response_cache.get_or_load(
+        ("mangasl-chapters", slug), lambda: with_session(_load_slug_chapters, slug),
+        # read_count içermez: sayaç flush'ı (manga:{id}) listeyi düşürmesin
+        lambda data: [f"chapters:{data['manga_id']}"],
+    )
+    conditional_response(request, response, make_etag("chapters", cached["manga_id"], cached["version"]), cached["updated_at"])
+    # Önbellekteki liste zaten doğrulanmış; her istekte yeniden doğrulanmaz
+    return json_response(cached["chapters"], response)
 
 
-    resulted = await session.execute(select(Manga).where(Manga.slug == slug))
-    db_manga = resulted.scalars().one_or_none()
-    if not db_manga:
-        raise HTTPException(status_code=404, detail="Manga not found")
-    print(db_manga)
-    result = await session.execute(select(Chapter).where(Chapter.manga_id == db_manga.id))
-    chapters = result.scalars().all()
-    return chapters
 
 
+MANIFEST_PREFETCH_PAGES = int(os.getenv("MANIFEST_PREFETCH_PAGES", "3"))
+
+def manifest_query(slug: str, chapter_number: int):
+    neighbour = aliased(Chapter)
+    prev_number = (
+        select(func.max(neighbour.chapter_number))
+        .where(neighbour.manga_id == Manga.id, neighbour.chapter_number < chapter_number)
+        .scalar_subquery()
+    )
+    next_chapter = (
+        select(neighbour.id, neighbour.chapter_number, neighbour.version)
+        .where(neighbour.manga_id == Manga.id, neighbour.chapter_number > chapter_number)
+        .order_by(neighbour.chapter_number)
+        .limit(1)
+        .lateral()
+    )
+    return (
+        select(
+            Manga.id, Manga.title, Manga.version.label("manga_version"), Manga.updated_at.label("manga_updated_at"),
+            Chapter.id.label("chapter_id"), Chapter.title.label("chapter_title"),
+            Chapter.release_date, Chapter.version, Chapter.updated_at, prev_number.label("prev_chapter"),
+            next_chapter.c.id.label("next_id"), next_chapter.c.chapter_number.label("next_chapter"),
+            next_chapter.c.version.label("next_version"),
+        )
+        .join(Chapter, and_(Chapter.manga_id == Manga.id, Chapter.chapter_number == chapter_number))
+        .outerjoin(next_chapter, true())
+        .where(Manga.slug == slug)
+    )
+
+def manifest_pages_query(chapter_id: int, next_id: Optional[int], prefetch: int):
+    # Bu bölümün tüm sayfaları ve sonrakinin ilk sayfaları tek sorguda
+    return (
+        select(ChapterPage.chapter_id, ChapterPage.storage_key, ChapterPage.width, ChapterPage.height)
+        .where(or_(
+            ChapterPage.chapter_id == chapter_id,
+            and_(ChapterPage.chapter_id == next_id, ChapterPage.page_index < prefetch),
+        ))
+        .order_by(ChapterPage.chapter_id, ChapterPage.page_index)
+    )
+
+async def _load_manifest(session, slug: str, chapter_number: int, prefetch: int) -> dict:
+    result = await session.execute(manifest_query(slug, chapter_number))
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
 
+    pages = await session.execute(manifest_pages_query(row.chapter_id, row.next_id, prefetch))
+    storage = get_storage()
+    current, upcoming = [], []
+    for chapter_id, key, width, height in pages.all():
+        if chapter_id == row.chapter_id:
+            current.append(dict(url=storage.url(key), width=width, height=height, srcset=srcset(key)))
+        else:
+            upcoming.append(storage.url(key))
+
+    manifest = ChapterManifest(
+        manga_id=row.id, slug=slug, manga_title=row.title,
+        chapter_id=row.chapter_id, chapter_number=chapter_number, title=row.chapter_title,
+        release_date=row.release_date, pages=current,
+        prev_chapter=row.prev_chapter, next_chapter=row.next_chapter, next_pages=upcoming,
+    )
+    return {
+        "manifest": manifest.model_dump(mode="json"),
+        "etag": make_etag(
+            "manifest", row.manga_version, row.chapter_id, row.version, row.next_id, row.next_version, prefetch
+        ),
+        "updated_at": max(row.updated_at, row.manga_updated_at),
+        "tags": [f"chapters:{row.id}", f"pages:{row.chapter_id}", f"pages:{row.next_id}"],
+    }
+
+@router.get("/mangasl/{slug}/chapter/{chapter_number}/manifest", response_model=ChapterManifest)
+async def get_chapter_manifest(
+    slug: str,
+    chapter_number: int,
+    request: Request,
+    response: Response,
+    prefetch: int = Query(MANIFEST_PREFETCH_PAGES, ge=0, le=20),
+):
+    # Okuyucu bölüm sayfalarını, komşu bölümleri ve ön yükleme listesini tek istekte alır
+    cached = await response_cache.get_or_load(
+        ("manifest", slug, chapter_number, prefetch),
+        lambda: with_session(_load_manifest, slug, chapter_number, prefetch),
+        lambda data: data["tags"],
+    )
+    not_modified = conditional_response(request, response, cached["etag"], cached["updated_at"])
+    if not_modified is not None:
+        return not_modified
+    return json_response(cached["manifest"], response)
 
 @router.get("/manga/{manga_id}/chapter/{chapter_number}/images", response_model=ChapterReadWithImages)
-async def get_chapter_images(manga_id: int, chapter_number: int, session: Session = Depends(get_session)):
-    result = await session.execute(select(Chapter).where(Chapter.manga_id == manga_id, Chapter.chapter_number == chapter_number))
-    chapter = result.scalars().one_or_none()
-    if not chapter:
+async def get_chapter_images(manga_id: int, chapter_number: int, request: Request, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1), session: Session = Depends(get_session)):
+    result = await session.execute(
+        select(Chapter.id, Chapter.version, Chapter.updated_at)
+        .where(Chapter.manga_id == manga_id, Chapter.chapter_number == chapter_number)
+    )
+    chapter = result.first()
+    if chapter is None:
         raise HTTPException(status_code=404, detail="Chapter not found")
+    headers = cache_headers(make_etag("images", chapter.id, chapter.version, offset, limit), chapter.updated_at)
+    if is_not_modified(request, headers["ETag"], chapter.updated_at):
+        return Response(status_code=304, headers=headers)
 
-    try:
-        images = json.loads(chapter.images)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Failed to parse images")
+    keys = await read_page_keys(session, Chapter.id == chapter.id, offset=offset, limit=limit)
+    if keys is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    storage = get_storage()
 
     return JSONResponse(
         status_code=200,
-        content={"images": images},
+        content={"images": [storage.url(key) for key in keys], "srcset": [srcset(key) for key in keys]},
+        headers=headers,
     )
 
 @router.put("/manga/{manga_id}/chapter/{chapter_number}/images")
 async def update_chapter_images(manga_id: int, chapter_number: int, update_request: ChapterUpdatewithImages, session: Session = Depends(get_session)):
-    chapter = await session.execute(select(Chapter).where(Chapter.manga_id == manga_id, Chapter.chapter_number == chapter_number))
-    chapter = chapter.scalars().one_or_none()
-    if not chapter:
+    result = await session.execute(select(Chapter.id).where(Chapter.manga_id == manga_id, Chapter.chapter_number == chapter_number))
+    chapter_id = result.scalar_one_or_none()
+    if chapter_id is None:
         raise HTTPException(status_code=404, detail="Chapter not found")
 
-    try:
-        chapter.images = json.dumps(update_request.images)
-        session.add(chapter)
-        await session.commit()
-        await session.refresh(chapter)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Failed to update images")
+    await replace_pages(session, chapter_id, update_request.images)
+    await session.commit()
+    response_cache.invalidate(f"pages:{chapter_id}")
 
     return {"message": "Images updated successfully"}
 
-@router.delete("/manga/{manga_id}/chapter/{chapter_id}/images/{image_index}")
-async def delete_chapter_image(manga_id: int, chapter_id: int, image_index: int, session: Session = Depends(get_session)):
+async def _get_manga_chapter(session, manga_id: int, chapter_id: int) -> Chapter:
     chapter = await session.get(Chapter, chapter_id)
     if not chapter or chapter.manga_id != manga_id:
         raise HTTPException(status_code=404, detail="Chapter not found")
+    return chapter
 
-    try:
-        images = json.loads(chapter.images)
-        if 0 <= image_index < len(images):
-            images.pop(image_index)
-            chapter.images = json.dumps(images)
-            session.add(chapter)
-            await session.commit()
-            await session.refresh(chapter)
-        else:
-            raise HTTPException(status_code=404, detail="Image not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Failed to update images")
+@router.post("/manga/{manga_id}/chapter/{chapter_id}/images")
+async def add_chapter_image(manga_id: int, chapter_id: int, page: ChapterPageCreate, session: Session = Depends(get_session)):
+    await _get_manga_chapter(session, manga_id, chapter_id)
+    index = await insert_page(session, chapter_id, page.image, page.index)
+    await session.commit()
+    response_cache.invalidate(f"pages:{chapter_id}")
+    return {"message": "Image added successfully", "index": index}
+
+@router.put("/manga/{manga_id}/chapter/{chapter_id}/images/{image_index}/position")
+async def move_chapter_image(manga_id: int, chapter_id: int, image_index: int, move: ChapterPageMove, session: Session = Depends(get_session)):
+    await _get_manga_chapter(session, manga_id, chapter_id)
+    if not await move_page(session, chapter_id, image_index, move.to):
+        raise HTTPException(status_code=404, detail="Image not found")
+    await session.commit()
+    response_cache.invalidate(f"pages:{chapter_id}")
+    return {"message": "Image moved successfully"}
+
+@router.delete("/manga/{manga_id}/chapter/{chapter_id}/images/{image_index}")
+async def delete_chapter_image(manga_id: int, chapter_id: int, image_index: int, session: Session = Depends(get_session)):
+    await _get_manga_chapter(session, manga_id, chapter_id)
+    if not await delete_page(session, chapter_id, image_index):
+        raise HTTPException(status_code=404, detail="Image not found")
+    await session.commit()
+    response_cache.invalidate(f"pages:{chapter_id}")
 
     return {"message": "Image deleted successfully"}
     
@@ -359,5 +575,7 @@ async def update_chapter_images(manga_id: int, chapter_number: int,  session: Se
         raise HTTPException(status_code=404, detail="Chapter not found")
 
     await session.delete(chapter)
+    await touch_manga(session, manga_id)
     await session.commit()
+    response_cache.invalidate(f"chapters:{manga_id}", "latest-chapters")
     return {"ok": True}
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy import exists
+from sqlmodel import select
+
+from ..database import async_session
+from ..ingest import TRANSCODE_WORKERS, get_transcode_executor
+from ..models import ChapterPage, ImageBlob
+from ..renditions import RENDITIONS, Rendition, render, rendition_key
+from ..storage import clean_key, get_storage
+
+logger = logging.getLogger(__name__)
+
+RENDITION_MAX_AGE = int(os.getenv("RENDITION_MAX_AGE", "86400"))
+RENDITION_KNOWN_SIZE = int(os.getenv("RENDITION_KNOWN_SIZE", "100000"))
+
+router = APIRouter()
+
+# Depoda olduğu bilinen rendition anahtarları (exists() her seferinde sorulmasın)
+_known: "OrderedDict[str, None]" = OrderedDict()
+_pending: Dict[str, asyncio.Future] = {}
+_render_slots: Optional[asyncio.Semaphore] = None
+
+
+def _remember(key: str):
+    _known[key] = None
+    _known.move_to_end(key)
+    if len(_known) > RENDITION_KNOWN_SIZE:
+        _known.popitem(last=False)
+
+
+def render_slots() -> asyncio.Semaphore:
+    # İsteğe bağlı üretimler havuza en fazla TRANSCODE_WORKERS iş bırakır,
+    # böylece yüklemelerin eager rendition işlerinin önüne yığılmazlar
+    global _render_slots
+    if _render_slots is None:
+        _render_slots = asyncio.Semaphore(TRANSCODE_WORKERS)
+    return _render_slots
+
+
+def page_key_query(key: str):
+    return select(exists().where(ImageBlob.storage_key == key) | exists().where(ChapterPage.storage_key == key))
+
+
+async def is_page_key(key: str) -> bool:
+    """Whether ``key`` is a stored page (``chapter_page`` or ``image_blob``)."""
+    async with async_session() as session:
+        result = await session.execute(page_key_query(key))
+        return result.scalar_one()
+
+
+async def _generate(key: str, target: str, rendition: Rendition):
+    if not await is_page_key(key):
+        raise HTTPException(status_code=404, detail="Image not found")
+    storage = get_storage()
+    try:
+        if await asyncio.to_thread(storage.exists, target):
+            return
+    except Exception as e:
+        logger.warning("Could not check %s: %s", target, e)
+        raise HTTPException(status_code=404, detail="Image not found")
+    async with render_slots():
+        try:
+            data = await asyncio.to_thread(storage.get, key)
+        except Exception as e:
+            # Arka uçlar eksik nesne için farklı hatalar atar (OSError, ClientError...)
+            logger.warning("Could not read %s: %s", key, e)
+            raise HTTPException(status_code=404, detail="Image not found")
+        loop = asyncio.get_running_loop()
+        try:
+            out = await loop.run_in_executor(get_transcode_executor(), render, data, rendition)
+        except Exception as e:
+            logger.warning("Could not render %s as %s: %s", key, rendition.name, e)
+            raise HTTPException(status_code=404, detail="Image not found")
+    await asyncio.to_thread(storage.put, target, out, rendition.content_type)
+
+
+async def ensure_rendition(key: str, rendition: Rendition) -> str:
+    """Storage key of the rendition, generating and storing it on first use."""
+    target = rendition_key(key, rendition)
+    if target in _known:
+        return target
+    pending = _pending.get(target)
+    if pending is None:
+        # Aynı sayfayı isteyenler tek üretimi bekler
+        pending = _pending[target] = asyncio.ensure_future(_generate(key, target, rendition))
+        pending.add_done_callback(lambda _: _pending.pop(target, None))
+    await asyncio.shield(pending)
+    _remember(target)
+    return target
+
+
+@router.get("/renditions/{name}/{key:path}")
+async def get_rendition(name: str, key: str):
+    rendition = RENDITIONS.get(name)
+    if rendition is None:
+        raise HTTPException(status_code=404, detail="Rendition not found")
+    try:
+        key = clean_key(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image key")
+    target = await ensure_rendition(key, rendition)
+    return RedirectResponse(
+        get_storage().url(target),
+        status_code=307,
+        headers={"Cache-Control": f"public, max-age={RENDITION_MAX_AGE}"},
+    )
@@ -0,0 +1,73 @@
+"""Manga search.
+
+Full-text search runs against the generated ``manga.search_vector`` column
+(GIN indexed). Every query word is matched as a prefix, so the same query
+serves autocomplete. When full-text search finds nothing and ``pg_trgm`` is
+installed, titles are matched by trigram similarity to tolerate typos.
+"""
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from .models import Manga
+
+TRGM_SIMILARITY_THRESHOLD = 0.3
+
+_word_re = re.compile(r"\w+", re.UNICODE)
+_trgm_available: Optional[bool] = None
+
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """``"one pie"`` -> ``"one:* & pie:*"``; None if there is nothing to search."""
+    words = _word_re.findall(q.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+async def trgm_available(session) -> bool:
+    global _trgm_available
+    if _trgm_available is None:
+        result = await session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trgm_available = result.first() is not None
+    return _trgm_available
+
+
+def fulltext_query(tsquery: str, limit: int = 20, offset: int = 0):
+    search_vector = Manga.__table__.c.search_vector
+    query = func.to_tsquery("simple", tsquery)
+    return (
+        select(Manga)
+        .where(search_vector.op("@@")(query))
+        .order_by(func.ts_rank_cd(search_vector, query).desc(), Manga.read_count.desc(), Manga.id)
+        .offset(offset)
+        .limit(limit)
+        .options(selectinload(Manga.categories))
+    )
+
+
+def trigram_query(q: str, limit: int = 20):
+    return (
+        select(Manga)
+        .where(Manga.title.op("%")(q))
+        .order_by(func.similarity(Manga.title, q).desc(), Manga.id)
+        .limit(limit)
+        .options(selectinload(Manga.categories))
+    )
+
+
+async def search_mangas(session, q: str, limit: int = 20, offset: int = 0) -> List[Manga]:
+    mangas: List[Manga] = []
+    tsquery = prefix_tsquery(q)
+    if tsquery is not None:
+        result = await session.execute(fulltext_query(tsquery, limit, offset))
+        mangas = result.scalars().all()
+
+    if not mangas and offset == 0 and await trgm_available(session):
+        await session.execute(text(f"SET LOCAL pg_trgm.similarity_threshold = {TRGM_SIMILARITY_THRESHOLD}"))
+        result = await session.execute(trigram_query(q, limit))
+        mangas = result.scalars().all()
+    return mangas
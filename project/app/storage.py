@@ -0,0 +1,351 @@
+"""Object storage backends for chapter pages.
+
+Objects are addressed by a relative key such as
+``manga_1/chapter_3/001.webp``; ``url(key)`` gives the public URL readers
+fetch it from. The backend is chosen with ``STORAGE_BACKEND``
+(``local``, ``sftp`` or ``s3``).
+
+All methods are blocking; call them through ``asyncio.to_thread`` from
+request handlers. Keys are validated with ``clean_key`` by every backend:
+absolute keys, backslashes and ``..`` segments are rejected so a key can
+never address anything outside the backend's root.
+"""
+import io
+import os
+import posixpath
+import stat
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+import paramiko
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_BASE_URL = os.getenv("STORAGE_BASE_URL", "/media")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def clean_key(key: str) -> str:
+    """Normalized ``key``; ``ValueError`` if it could escape the storage root."""
+    if not key or key.startswith("/") or "\\" in key or "\x00" in key or ".." in key.split("/"):
+        raise ValueError(f"Invalid storage key: {key}")
+    normalized = posixpath.normpath(key)
+    if normalized == ".":
+        raise ValueError(f"Invalid storage key: {key}")
+    return normalized
+
+
+class StorageBackend(ABC):
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str = "image/webp"):
+        ...
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]], content_type: str = "image/webp"):
+        for key, data in items:
+            self.put(key, data, content_type)
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    def url(self, key: str) -> str:
+        # Eski kayıtlardan gelen tam URL'ler olduğu gibi döner
+        if key.startswith(("http://", "https://", "/")):
+            return key
+        return f"{self.base_url}/{key}"
+
+    def key_for(self, url: str) -> str:
+        """Inverse of ``url``: strip the public prefix from our own URLs."""
+        prefix = f"{self.base_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else url
+
+    def close(self):
+        pass
+
+
+class LocalStorage(StorageBackend):
+    """Stores objects under a directory; useful for development and benchmarks."""
+
+    def __init__(self, root: str, base_url: str):
+        super().__init__(base_url)
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, clean_key(key)))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str = "image/webp"):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SFTPStorage(StorageBackend):
+    """SFTP backend with a pool of long-lived connections.
+
+    Directories known to exist are cached, so uploading a chapter costs one
+    ``mkdir`` per new directory instead of one per path segment per file.
+    ``put_many`` spreads a batch over the pooled connections.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, root: str,
+                 base_url: str, pool_size: int = 4):
+        super().__init__(base_url)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.root = root.rstrip("/")
+        self.pool_size = pool_size
+        # Boşta bağlantılar + açık bağlantı sayısı tek koşul değişkeniyle korunur:
+        # bağlantı bırakılınca veya ölüp düşülünce bekleyen bir çağıran uyanır
+        self._idle: List[Tuple[paramiko.Transport, paramiko.SFTPClient]] = []
+        self._opened = 0
+        self._available = threading.Condition()
+        self._known_dirs = set()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sftp")
+
+    def _open(self) -> Tuple[paramiko.Transport, paramiko.SFTPClient]:
+        transport = paramiko.Transport((self.host, self.port))
+        transport.connect(username=self.username, password=self.password)
+        return transport, paramiko.SFTPClient.from_transport(transport)
+
+    def _acquire(self) -> Tuple[paramiko.Transport, paramiko.SFTPClient]:
+        with self._available:
+            while not self._idle and self._opened >= self.pool_size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._opened += 1
+        try:
+            return self._open()
+        except Exception:
+            self._discard()
+            raise
+
+    def _release(self, connection: Tuple[paramiko.Transport, paramiko.SFTPClient]):
+        with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+
+    def _discard(self):
+        with self._available:
+            self._opened -= 1
+            self._available.notify()
+
+    @contextmanager
+    def _connection(self):
+        connection = self._acquire()
+        transport, sftp = connection
+        if not transport.is_active():
+            sftp.close()
+            transport.close()
+            try:
+                transport, sftp = connection = self._open()
+            except Exception:
+                self._discard()
+                raise
+        try:
+            yield sftp
+        except (paramiko.SSHException, EOFError, OSError):
+            if not transport.is_active():
+                sftp.close()
+                transport.close()
+                self._discard()
+                connection = None
+            raise
+        finally:
+            if connection is not None:
+                self._release(connection)
+
+    def _makedirs(self, sftp: paramiko.SFTPClient, directory: str):
+        if directory in self._known_dirs or directory == self.root:
+            return
+        parent = directory.rsplit("/", 1)[0]
+        if parent and parent != directory:
+            self._makedirs(sftp, parent)
+        try:
+            sftp.mkdir(directory)
+        except IOError:
+            pass  # Dizin zaten mevcut olabilir
+        self._known_dirs.add(directory)
+
+    def _path(self, key: str) -> str:
+        return f"{self.root}/{clean_key(key)}"
+
+    def put(self, key: str, data: bytes, content_type: str = "image/webp"):
+        path = self._path(key)
+        with self._connection() as sftp:
+            self._makedirs(sftp, path.rsplit("/", 1)[0])
+            sftp.putfo(io.BytesIO(data), path, confirm=False)
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]], content_type: str = "image/webp"):
+        futures = [self._executor.submit(self.put, key, data, content_type) for key, data in items]
+        for future in futures:
+            future.result()
+
+    def get(self, key: str) -> bytes:
+        with self._connection() as sftp:
+            with sftp.open(self._path(key), "rb") as f:
+                f.prefetch()
+                return f.read()
+
+    def exists(self, key: str) -> bool:
+        with self._connection() as sftp:
+            try:
+                return stat.S_ISREG(sftp.stat(self._path(key)).st_mode)
+            except IOError:
+                return False
+
+    def delete(self, key: str):
+        with self._connection() as sftp:
+            try:
+                sftp.remove(self._path(key))
+            except IOError:
+                pass
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+        for transport, sftp in idle:
+            sftp.close()
+            transport.close()
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible backend (AWS, MinIO, R2, ...). Requires ``boto3``."""
+
+    def __init__(self, bucket: str, base_url: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None, max_workers: int = 8):
+        super().__init__(base_url)
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(max_pool_connections=max_workers),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3")
+
+    def _key(self, key: str) -> str:
+        key = clean_key(key)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, data: bytes, content_type: str = "image/webp"):
+        self._client.put_object(
+            Bucket=self.bucket, Key=self._key(key), Body=data,
+            ContentType=content_type, CacheControl=CACHE_CONTROL,
+        )
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]], content_type: str = "image/webp"):
+        futures = [self._executor.submit(self.put, key, data, content_type) for key, data in items]
+        for future in futures:
+            future.result()
+
+    def get(self, key: str) -> bytes:
+        return self._client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    if backend == "local":
+        return LocalStorage(
+            root=os.getenv("LOCAL_STORAGE_ROOT", "media"),
+            base_url=STORAGE_BASE_URL,
+        )
+    if backend == "sftp":
+        return SFTPStorage(
+            host=os.environ["SFTP_HOST"],
+            port=int(os.getenv("SFTP_PORT", "22")),
+            username=os.environ["SFTP_USERNAME"],
+            password=os.environ["SFTP_PASSWORD"],
+            root=os.getenv("SFTP_ROOT", "/upload"),
+            base_url=STORAGE_BASE_URL,
+            pool_size=int(os.getenv("SFTP_POOL_SIZE", "4")),
+        )
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            base_url=STORAGE_BASE_URL,
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+            access_key=os.getenv("S3_ACCESS_KEY_ID"),
+            secret_key=os.getenv("S3_SECRET_ACCESS_KEY"),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+def close_storage():
+    global _storage
+    if _storage is not None:
+        _storage.close()
+        _storage = None
@@ -0,0 +1,47 @@
+"""Chapter list endpoints that select only their response columns.
+
+Seeds a 2000-chapter series (slug ``s1``) and times
+``/manga/{id}/chapters`` and ``/mangasl/{slug}/chapters`` with the
+response cache cleared before every request. Also prints how many bytes
+of row data Postgres produces for the full ``chapter`` rows versus only
+the columns the response needs.
+
+    BENCH_DATABASE_URL=... python -m bench.chapter_lists
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from bench.common import client, measure, report, seed
+from app.database import engine
+
+URLS = ["/manga/1/chapters", "/mangasl/s1/chapters"]
+
+ROW_SIZES = {
+    "full chapter rows": "SELECT sum(pg_column_size(c.*)) FROM chapter c WHERE c.manga_id = 1",
+    "response columns": (
+        "SELECT sum(pg_column_size(ROW(c.title, c.chapter_number, c.manga_id, c.release_date, c.is_public))) "
+        "FROM chapter c WHERE c.manga_id = 1"
+    ),
+    # Slug uç noktası: manga ile tek sorguda birleştirilmiş satırlar
+    "slug join columns": (
+        "SELECT sum(pg_column_size(ROW(m.id, m.version, m.updated_at, c.title, c.chapter_number, "
+        "c.release_date, c.is_public))) FROM manga m LEFT JOIN chapter c ON c.manga_id = m.id WHERE m.slug = 's1'"
+    ),
+}
+
+
+async def main():
+    await seed(mangas=10, chapters=2000)
+    from app.cache import response_cache
+    async with client() as c:
+        for url in URLS:
+            report(url, *await measure(c, url, before=response_cache.clear))
+    async with engine.connect() as conn:
+        for label, sql in ROW_SIZES.items():
+            size = (await conn.execute(text(sql))).scalar_one()
+            print(f"{label:34s} {size:>9,d} bytes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
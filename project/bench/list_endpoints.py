@@ -0,0 +1,30 @@
+"""Big list endpoints served through the orjson fast path (``app/fast_json.py``).
+
+Seeds 1000 mangas in one category and a 2000-chapter series, then times
+each endpoint with the response cache cleared before every request so
+the query and serialization cost is measured, not the cache.
+
+    BENCH_DATABASE_URL=... python -m bench.list_endpoints
+"""
+import asyncio
+
+from bench.common import client, measure, report, seed
+
+URLS = [
+    "/manga/?limit=500",
+    "/manga/1/chaptersall",
+    "/category/1?limit=500",
+    "/category/browse?all=1&limit=200",
+]
+
+
+async def main():
+    await seed(mangas=1000, chapters=2000)
+    from app.cache import response_cache
+    async with client() as c:
+        for url in URLS:
+            report(url, *await measure(c, url, before=response_cache.clear))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
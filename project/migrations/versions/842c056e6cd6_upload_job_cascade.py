@@ -0,0 +1,32 @@
+"""upload_job_cascade
+
+Revision ID: 842c056e6cd6
+Revises: 59479891bb66
+Create Date: 2026-10-18 14:53:18.642474
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel             # NEW
+
+
+# revision identifiers, used by Alembic.
+revision = '842c056e6cd6'
+down_revision = '59479891bb66'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Manga silinince yükleme işleri (ve bölüm ilerlemeleri) de silinir
+    op.drop_constraint('upload_job_manga_id_fkey', 'upload_job', type_='foreignkey')
+    op.create_foreign_key('upload_job_manga_id_fkey', 'upload_job', 'manga', ['manga_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('upload_job_chapter_job_id_fkey', 'upload_job_chapter', type_='foreignkey')
+    op.create_foreign_key('upload_job_chapter_job_id_fkey', 'upload_job_chapter', 'upload_job', ['job_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('upload_job_chapter_job_id_fkey', 'upload_job_chapter', type_='foreignkey')
+    op.create_foreign_key('upload_job_chapter_job_id_fkey', 'upload_job_chapter', 'upload_job', ['job_id'], ['id'])
+    op.drop_constraint('upload_job_manga_id_fkey', 'upload_job', type_='foreignkey')
+    op.create_foreign_key('upload_job_manga_id_fkey', 'upload_job', 'manga', ['manga_id'], ['id'])
@@ -0,0 +1,116 @@
+"""Bitmap helpers and set operations of the in-process category index; no database needed."""
+import pytest
+
+from app.category_index import CategoryIndex, bit_count, bitmap_of, bitmap_page
+
+# 64 bitlik kelime sınırlarının iki yanındaki id'ler
+IDS = [0, 1, 62, 63, 64, 65, 127, 128, 200, 1000]
+
+
+def test_bitmap_of():
+    assert bitmap_of([]) == 0
+    assert bitmap_of([0]) == 1
+    assert bitmap_of([3, 1]) == 0b1010
+    assert bitmap_of([7, 8]) == (1 << 7) | (1 << 8)
+    assert bitmap_of([5, 5]) == 1 << 5
+    assert bitmap_of(iter(IDS)) == sum(1 << i for i in IDS)
+    assert bit_count(bitmap_of(IDS)) == len(IDS)
+
+
+def test_bitmap_page_empty():
+    assert bitmap_page(0) == []
+    assert bitmap_page(0, 5, 10, descending=True) == []
+
+
+def test_bitmap_page_all():
+    bitmap = bitmap_of(IDS)
+    assert bitmap_page(bitmap) == IDS
+    assert bitmap_page(bitmap, descending=True) == IDS[::-1]
+
+
+@pytest.mark.parametrize("offset", range(len(IDS) + 2))
+@pytest.mark.parametrize("limit", [None, 1, 2, 3, 5])
+@pytest.mark.parametrize("descending", [False, True])
+def test_bitmap_page_window(offset, limit, descending):
+    ordered = IDS[::-1] if descending else IDS
+    expected = ordered[offset:] if limit is None else ordered[offset:offset + limit]
+    assert bitmap_page(bitmap_of(IDS), offset, limit, descending) == expected
+
+
+def test_bitmap_page_skips_empty_words():
+    # Aradaki boş kelimeler atlanır, sayfa kelime sınırını aşar
+    ids = [63, 64 * 5, 64 * 5 + 63, 64 * 9 + 1]
+    bitmap = bitmap_of(ids)
+    assert bitmap_page(bitmap, 1, 2) == [64 * 5, 64 * 5 + 63]
+    assert bitmap_page(bitmap, 1, 2, descending=True) == [64 * 5 + 63, 64 * 5]
+    assert bitmap_page(bitmap, 3, 5) == [64 * 9 + 1]
+    assert bitmap_page(bitmap, 3, 5, descending=True) == [63]
+
+
+def _index() -> CategoryIndex:
+    # 1: aksiyon, 2: romantik, 3: korku
+    index = CategoryIndex()
+    index.set_manga(10, [1, 2])
+    index.set_manga(11, [1])
+    index.set_manga(70, [1, 3])
+    index.set_manga(130, [2, 3])
+    index.set_manga(200, [])
+    return index
+
+
+def _ids(index: CategoryIndex, **kwargs) -> list:
+    return bitmap_page(index.query(**kwargs))
+
+
+def test_query_all_any_none():
+    index = _index()
+    assert _ids(index) == [10, 11, 70, 130, 200]
+    assert _ids(index, all_of=[1]) == [10, 11, 70]
+    assert _ids(index, all_of=[1, 2]) == [10]
+    assert _ids(index, any_of=[2, 3]) == [10, 70, 130]
+    assert _ids(index, none_of=[1]) == [130, 200]
+    assert _ids(index, none_of=[1, 2]) == [200]
+    assert _ids(index, all_of=[1], none_of=[3]) == [10, 11]
+    assert _ids(index, all_of=[1], any_of=[2, 3], none_of=[2]) == [70]
+
+
+def test_query_unknown_category():
+    index = _index()
+    assert _ids(index, all_of=[99]) == []
+    assert _ids(index, any_of=[99]) == []
+    assert _ids(index, none_of=[99]) == [10, 11, 70, 130, 200]
+
+
+def test_set_manga_replaces_categories():
+    index = _index()
+    index.set_manga(10, [3])
+    assert _ids(index, all_of=[1]) == [11, 70]
+    assert _ids(index, all_of=[2]) == [130]
+    assert _ids(index, all_of=[3]) == [10, 70, 130]
+    index.set_manga(11, [4])
+    assert _ids(index, all_of=[4]) == [11]
+
+
+def test_remove_manga():
+    index = _index()
+    index.remove_manga(70)
+    index.remove_manga(200)
+    assert _ids(index) == [10, 11, 130]
+    assert _ids(index, all_of=[3]) == [130]
+    assert _ids(index, none_of=[1]) == [130]
+    # Olmayan manga silinince bir şey değişmez
+    index.remove_manga(999)
+    assert _ids(index) == [10, 11, 130]
+
+
+def test_remove_category():
+    index = _index()
+    index.remove_category(1)
+    assert _ids(index, all_of=[1]) == []
+    assert _ids(index, none_of=[1]) == [10, 11, 70, 130, 200]
+
+
+def test_page_counts_all_matches():
+    index = _index()
+    assert index.page(index.query(any_of=[1, 2]), 1, 2) == (4, [11, 70])
+    assert index.page(index.query(any_of=[1, 2]), 1, 2, descending=True) == (4, [70, 11])
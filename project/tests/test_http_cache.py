@@ -0,0 +1,117 @@
+"""Conditional request helpers (ETag / Last-Modified / 304); no database needed."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import Request, Response
+
+from app.http_cache import cache_headers, conditional_response, has_validators, is_not_modified, make_etag
+
+ETAG = make_etag("manga", 1, 3)
+WEAK_ETAG = make_etag("manga", 1, 3, weak=True)
+OTHER = make_etag("manga", 1, 4)
+MODIFIED = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def test_make_etag():
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert WEAK_ETAG == "W/" + ETAG
+    assert make_etag("manga", 1, 3) == ETAG
+    assert OTHER != ETAG
+
+
+def test_no_validators():
+    request = _request()
+    assert not has_validators(request)
+    assert not is_not_modified(request, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("etag", [ETAG, WEAK_ETAG])
+@pytest.mark.parametrize("header", [ETAG, WEAK_ETAG])
+def test_if_none_match_weak_comparison(etag, header):
+    # Zayıf karşılaştırma: W/ öneki hangi tarafta olursa olsun eşleşir
+    assert is_not_modified(_request(if_none_match=header), etag)
+
+
+@pytest.mark.parametrize("header", [OTHER, "W/" + OTHER, '""', ETAG.strip('"'), ""])
+def test_if_none_match_mismatch(header):
+    assert not is_not_modified(_request(if_none_match=header), ETAG)
+    assert not is_not_modified(_request(if_none_match=header), WEAK_ETAG)
+
+
+def test_if_none_match_star():
+    assert is_not_modified(_request(if_none_match="*"), ETAG)
+    assert is_not_modified(_request(if_none_match=f"{OTHER}, *"), WEAK_ETAG)
+
+
+@pytest.mark.parametrize("header", [
+    f"{OTHER}, {ETAG}",
+    f"{OTHER},{WEAK_ETAG}",
+    f"  W/{OTHER} ,  {ETAG}  ",
+])
+def test_if_none_match_list(header):
+    assert is_not_modified(_request(if_none_match=header), ETAG)
+
+
+def test_if_none_match_list_without_current():
+    assert not is_not_modified(_request(if_none_match=f"{OTHER}, W/{OTHER}"), ETAG)
+
+
+def test_if_modified_since():
+    assert is_not_modified(_request(if_modified_since=_http_date(MODIFIED)), ETAG, MODIFIED)
+    # Başlık saniye hassasiyetinde; aynı saniyedeki değişiklik 304 kalır
+    assert is_not_modified(_request(if_modified_since=_http_date(MODIFIED.replace(microsecond=0))), ETAG, MODIFIED)
+    assert is_not_modified(_request(if_modified_since=_http_date(MODIFIED + timedelta(hours=1))), ETAG, MODIFIED)
+    assert not is_not_modified(_request(if_modified_since=_http_date(MODIFIED - timedelta(seconds=1))), ETAG, MODIFIED)
+
+
+def test_if_modified_since_local_time():
+    # Veritabanı zamanları yerel ve saat dilimsiz
+    local = MODIFIED.astimezone().replace(tzinfo=None)
+    assert is_not_modified(_request(if_modified_since=_http_date(MODIFIED)), ETAG, local)
+    assert not is_not_modified(_request(if_modified_since=_http_date(MODIFIED - timedelta(minutes=1))), ETAG, local)
+
+
+@pytest.mark.parametrize("header", ["yesterday", "", "Wed, 99 Foo 2024 00:00:00 GMT"])
+def test_if_modified_since_invalid(header):
+    assert not is_not_modified(_request(if_modified_since=header), ETAG, MODIFIED)
+
+
+def test_if_modified_since_without_last_modified():
+    assert not is_not_modified(_request(if_modified_since=_http_date(MODIFIED)), ETAG)
+
+
+def test_if_none_match_takes_precedence():
+    fresh = _http_date(MODIFIED + timedelta(hours=1))
+    stale = _http_date(MODIFIED - timedelta(hours=1))
+    # ETag eşleşmiyorsa tarih güncel olsa da 200
+    assert not is_not_modified(_request(if_none_match=OTHER, if_modified_since=fresh), ETAG, MODIFIED)
+    # ETag eşleşiyorsa tarih eski olsa da 304
+    assert is_not_modified(_request(if_none_match=ETAG, if_modified_since=stale), ETAG, MODIFIED)
+
+
+def test_conditional_response():
+    request = _request(if_none_match=ETAG)
+    not_modified = conditional_response(request, Response(), ETAG, MODIFIED)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == ETAG
+    assert not_modified.headers["last-modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+
+    response = Response()
+    assert conditional_response(_request(if_none_match=OTHER), response, ETAG, MODIFIED) is None
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_cache_headers_without_last_modified():
+    headers = cache_headers(WEAK_ETAG, max_age=5)
+    assert headers == {"ETag": WEAK_ETAG, "Cache-Control": "public, max-age=5"}
@@ -0,0 +1,129 @@
+"""Cursor encoding and keyset helpers; no database needed."""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.models import MANGA_LATEST_SORT, MANGA_RATING_SORT, Manga
+from app.pagination import _coerce, decode_cursor, decode_sort_cursor, encode_cursor, keyset_page
+from sqlmodel import select
+
+
+def _raw_cursor(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _rejected(call, *args):
+    with pytest.raises(HTTPException) as error:
+        call(*args)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [42],
+    ["title", "çağ ğ/?+=", 7],
+    ["rating", 4.5, 12],
+    ["latest", "2021-01-01T10:30:00", 3],
+    [None, True, -1],
+])
+def test_round_trip(values):
+    cursor = encode_cursor(values)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+def test_encode_dates():
+    cursor = encode_cursor(["latest", datetime(2021, 1, 1, 10, 30), 3])
+    assert decode_cursor(cursor) == ["latest", "2021-01-01T10:30:00", 3]
+
+
+def test_encode_unsupported_type():
+    with pytest.raises(TypeError):
+        encode_cursor([object()])
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    _raw_cursor("not json"),
+    _raw_cursor('{"sort": "id"}'),
+    _raw_cursor('"id"'),
+    _raw_cursor("42"),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_decode_rejects_garbage(cursor):
+    _rejected(decode_cursor, cursor)
+
+
+def test_sort_cursor():
+    assert decode_sort_cursor(encode_cursor(["rating", 4.5, 12]), "rating") == [4.5, 12]
+    assert decode_sort_cursor(encode_cursor(["id", 12]), "id") == [12]
+
+
+@pytest.mark.parametrize("values", [[], ["title", "a", 1], [None, 1], [["rating"], 1]])
+def test_sort_cursor_mismatch(values):
+    _rejected(decode_sort_cursor, encode_cursor(values), "rating")
+
+
+def test_coerce_datetime():
+    assert _coerce(MANGA_LATEST_SORT, "2021-01-01T10:30:00") == datetime(2021, 1, 1, 10, 30)
+    assert _coerce(Manga.last_chapter_at, "2021-01-01") == datetime(2021, 1, 1)
+    assert _coerce(MANGA_LATEST_SORT, None) is None
+
+
+@pytest.mark.parametrize("value", ["yesterday", "2021-13-01", 1609459200, 1.5, ["2021-01-01"]])
+def test_coerce_datetime_rejects(value):
+    _rejected(_coerce, MANGA_LATEST_SORT, value)
+
+
+def test_coerce_float():
+    assert _coerce(MANGA_RATING_SORT, 4.5) == 4.5
+    value = _coerce(Manga.rating, 5)
+    assert value == 5.0 and isinstance(value, float)
+
+
+@pytest.mark.parametrize("value", ["4.5", True, {"$gt": 0}, [1]])
+def test_coerce_float_rejects(value):
+    _rejected(_coerce, MANGA_RATING_SORT, value)
+
+
+def test_coerce_other_types():
+    assert _coerce(Manga.id, 7) == 7
+    assert _coerce(Manga.title, "One Piece") == "One Piece"
+    _rejected(_coerce, Manga.id, "7")
+    _rejected(_coerce, Manga.id, 7.5)
+    _rejected(_coerce, Manga.id, False)
+    _rejected(_coerce, Manga.title, 7)
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_keyset_page_first_page():
+    sql = _sql(keyset_page(select(Manga.id), (Manga.read_count, Manga.id), None, descending=True))
+    assert "WHERE" not in sql
+    assert "ORDER BY manga.read_count DESC, manga.id DESC" in sql
+
+
+def test_keyset_page_after():
+    asc = _sql(keyset_page(select(Manga.id), (Manga.title, Manga.id), ["b", 3]))
+    assert "(manga.title, manga.id) > (" in asc
+    desc = _sql(keyset_page(select(Manga.id), (Manga.read_count, Manga.id), [10, 3], descending=True))
+    assert "(manga.read_count, manga.id) < (" in desc
+
+
+@pytest.mark.parametrize("values", [[], [3], ["b", 3, 4]])
+def test_keyset_page_wrong_length(values):
+    _rejected(keyset_page, select(Manga.id), (Manga.title, Manga.id), values)
+
+
+def test_keyset_page_tampered_value():
+    cursor = _raw_cursor(json.dumps(["rating", "1 OR 1=1", 3]))
+    after = decode_sort_cursor(cursor, "rating")
+    _rejected(keyset_page, select(Manga.id), (MANGA_RATING_SORT, Manga.id), after, True)
@@ -0,0 +1,201 @@
+"""The hot read queries must be served by their index.
+
+The statements are built by the same functions the routes use, so the
+test follows the routes when they change. They are EXPLAINed against the
+database in ``DATABASE_URL`` (migrated to head) after seeding a few
+thousand mangas, chapters and pages and running ANALYZE, all inside a
+transaction that is rolled back. A query passes when its plan has no
+Seq Scan and uses every index it was built for; a full scan of some other
+index (e.g. the primary key) counts as a miss. Skipped when no database is
+reachable.
+"""
+import asyncio
+import os
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    # app.database motoru içe aktarılırken kurar
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from app.chapter_pages import page_keys_query
+from app.jobs import next_job_query
+from app.models import Chapter, Manga, MangaRead
+from app.fast_json import model_columns
+from app.routers.chapter import latest_updates_query
+from app.routers.manga import (
+    MANGA_SORTS, manga_chapters_query, manga_filters, manga_list_query, manifest_pages_query, manifest_query,
+    slug_chapters_query,
+)
+from app.routers.renditions import page_key_query
+from app.search import fulltext_query, prefix_tsquery, trigram_query
+
+SEED_MANGAS = 3000
+SEED_CHAPTERS = 10  # manga başına
+SEED_PAGES = 20  # ilk 2000 bölümün her biri için
+# Tohum satırları sabit id'lerle eklenir, sorgular bu id'leri kullanır
+BASE = 1_000_000
+MANGA_ID = BASE + 10
+CHAPTER_ID = BASE + (MANGA_ID - BASE - 1) * SEED_CHAPTERS + 3  # MANGA_ID manganın 3. bölümü
+CATEGORY_ID = BASE + 3
+
+SEED = [
+    """INSERT INTO manga (id, title, author, slug, rating, year, read_count, genre, language)
+       SELECT :base + i, 'title ' || md5(i::text), 'author ' || (i % 50), 'seed-' || i, (i % 100) / 10.0,
+              1990 + i % 35, i * 7 % 1000, 'genre' || (i % 12), 'lang' || (i % 5)
+       FROM generate_series(1, :mangas) AS i""",
+    """INSERT INTO chapter (id, manga_id, chapter_number, title, release_date, is_public)
+       SELECT :base + (m - 1) * :chapters + n, :base + m, n, 'Chapter ' || n,
+              timestamp '2020-01-01' + (m * 10 + n) * interval '1 hour', true
+       FROM generate_series(1, :mangas) AS m, generate_series(1, :chapters) AS n""",
+    """INSERT INTO chapter_page (chapter_id, page_index, storage_key)
+       SELECT :base + c, p, 'pages/' || c || '/' || p || '.webp'
+       FROM generate_series(1, 2000) AS c, generate_series(0, :pages - 1) AS p""",
+    """INSERT INTO image_blob (content_hash, storage_key, width, height, byte_size)
+       SELECT md5(i::text), 'blobs/' || md5(i::text) || '.webp', 800, 1200, 1000
+       FROM generate_series(1, 20000) AS i""",
+    "INSERT INTO category (id, name) SELECT :base + i, 'seed category ' || i FROM generate_series(1, 20) AS i",
+    """INSERT INTO mangacategorylink (manga_id, category_id)
+       SELECT :base + m, :base + c FROM generate_series(1, :mangas) AS m, generate_series(1, 20) AS c
+       WHERE (m + c) % 7 = 0""",
+    """INSERT INTO upload_job (id, manga_id, status, archive_path, attempts, created_at, updated_at)
+       SELECT :base + i, :base + i, CASE WHEN i % 100 = 0 THEN 'queued' ELSE 'completed' END,
+              '/tmp/seed.zip', 1, now(), now()
+       FROM generate_series(1, :mangas) AS i""",
+]
+
+SEEDED_TABLES = ("manga", "chapter", "chapter_page", "image_blob", "category", "mangacategorylink",
+                 "upload_job", "latest_update")
+
+MANGA_FIELDS = model_columns(Manga, MangaRead, exclude=("categories",))
+SORT_INDEXES = {
+    "id": "manga_pkey",
+    "title": "ix_manga_title",
+    "popular": "ix_manga_read_count",
+    "read_count": "ix_manga_read_count",
+    "rating": "ix_manga_rating_sort",
+    "year": "ix_manga_year_sort",
+    "latest": "ix_manga_latest_sort",
+}
+SORT_AFTER = {
+    "id": [BASE + 1500],
+    "title": ["title 8", BASE + 1500],
+    "popular": [500, BASE + 1500],
+    "read_count": [500, BASE + 1500],
+    "rating": [5.0, BASE + 1500],
+    "year": [2005, BASE + 1500],
+    "latest": [datetime(2021, 1, 1).isoformat(), BASE + 1500],
+}
+
+
+def _queries() -> dict:
+    # ad -> (sorgu, kullanması gereken indeksler)
+    queries = {}
+    for sort in MANGA_SORTS:
+        index = SORT_INDEXES[sort]
+        queries[f"manga_list_{sort}"] = (manga_list_query(MANGA_FIELDS, sort).limit(20), (index,))
+        queries[f"manga_list_{sort}_cursor"] = (
+            manga_list_query(MANGA_FIELDS, sort, SORT_AFTER[sort]).limit(20), (index,)
+        )
+    queries["manga_list_category"] = (
+        manga_list_query(MANGA_FIELDS, "id", filters=manga_filters(category=[CATEGORY_ID])).limit(20),
+        ("ix_mangacategorylink_category_manga",),
+    )
+    queries["search_fulltext"] = (fulltext_query(prefix_tsquery("c4ca")), ("ix_manga_search_vector",))
+    queries["search_trigram"] = (trigram_query("tilte c4ca"), ("ix_manga_title_trgm",))
+    queries["chapter_page_range"] = (
+        page_keys_query(Chapter.id == CHAPTER_ID, offset=5, limit=10), ("chapter_pkey", "chapter_page_pkey")
+    )
+    queries["manifest"] = (manifest_query("seed-10", 3), ("manga_slug_key", "uq_manga_chapter"))
+    queries["manifest_pages"] = (manifest_pages_query(CHAPTER_ID, CHAPTER_ID + 1, 3), ("chapter_page_pkey",))
+    queries["latest_feed"] = (latest_updates_query(6), ("ix_latest_update_release_date",))
+    queries["latest_feed_cursor"] = (
+        latest_updates_query(6, [datetime(2021, 1, 1).isoformat(), MANGA_ID]), ("ix_latest_update_release_date",)
+    )
+    # Ya akış indeksinden yürür ve üyeliği birincil anahtardan sorar ya da
+    # kategorinin mangalarını indeksten alıp sıralar; seçiciliğe göre ikisi de doğru
+    queries["latest_feed_category"] = (
+        latest_updates_query(6, category=CATEGORY_ID),
+        (("ix_latest_update_release_date", "ix_mangacategorylink_category_manga"),),
+    )
+    queries["manga_chapters"] = (manga_chapters_query(MANGA_ID), ("uq_manga_chapter",))
+    queries["slug_chapters"] = (
+        slug_chapters_query("seed-10"),
+        ("manga_slug_key", "uq_manga_chapter"),
+    )
+    queries["job_queue"] = (next_job_query(), ("ix_upload_job_status",))
+    queries["rendition_page_key"] = (
+        page_key_query("pages/13/1.webp"), ("ix_image_blob_storage_key", "ix_chapter_page_storage_key")
+    )
+    return queries
+
+
+QUERIES = _queries()
+
+
+# pg_trgm kurulu değilse trigram indeksi (ve % operatörü) yoktur; diğer
+# indekslerin eksikliği testi başarısız kılar
+OPTIONAL_INDEXES = {"ix_manga_title_trgm"}
+
+
+def _optional_missing(expected, indexes) -> list:
+    return [index for index in expected if index in OPTIONAL_INDEXES and index not in indexes]
+
+
+async def _explain(conn, statement) -> str:
+    # Parametreler sürücüye verilir; plan gerçek değerlerle yapılır
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    result = await conn.exec_driver_sql(
+        "EXPLAIN " + compiled.string, tuple(params[name] for name in compiled.positiontup)
+    )
+    return "\n".join(row[0] for row in result)
+
+
+async def _explain_all() -> dict:
+    engine = create_async_engine(DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                params = dict(base=BASE, mangas=SEED_MANGAS, chapters=SEED_CHAPTERS, pages=SEED_PAGES)
+                for statement in SEED:
+                    await conn.execute(text(statement), params)
+                await conn.execute(text("ANALYZE " + ", ".join(SEEDED_TABLES)))
+                indexes = set((await conn.execute(text("SELECT indexname FROM pg_indexes"))).scalars())
+                plans = {}
+                for name, (statement, expected) in QUERIES.items():
+                    if not _optional_missing(expected, indexes):
+                        plans[name] = await _explain(conn, statement)
+                return {"indexes": indexes, "plans": plans}
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def explained() -> dict:
+    try:
+        return asyncio.run(_explain_all())
+    except OSError as e:
+        pytest.skip(f"database not reachable: {e}")
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_uses_index(name, explained):
+    _, indexes = QUERIES[name]
+    missing = _optional_missing(indexes, explained["indexes"])
+    if missing:
+        pytest.skip(f"optional index not in this database: {missing}")
+    plan = explained["plans"][name]
+    assert "Seq Scan" not in plan, plan
+    for index in indexes:
+        # Demet: planlayıcının seçebileceği eşdeğer indeksler
+        choices = index if isinstance(index, tuple) else (index,)
+        assert any(re.search(rf"(using|Index Scan on|Bitmap Index Scan on) {choice}\b", plan) for choice in choices), plan